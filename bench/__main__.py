@@ -0,0 +1,6 @@
+import sys
+
+from bench.run import main
+
+# python -m bench [--suites parse,fields,memory,pipeline] [--set-baseline] [--threshold 0.1]
+sys.exit(main())
@@ -0,0 +1,76 @@
+import random
+
+# Synthetic pages shaped like the real sites (same containers, labels and quirks the parsers
+# handle), deterministic per index. `extra` makes larger pages: more label blocks / more
+# article paragraphs and page chrome, for the long-page cases.
+
+
+def yp_company(i, extra=0):
+    r = random.Random(i)
+    phones = "".join(f'<a href="tel:{x}">{x}</a> ' for x in [
+        f"(012) 4{i % 100:02d} 55 {r.randint(10, 99)}", f"+994 50 {i % 1000:03d} 11 22", "0124445566",
+    ][: r.randint(1, 3)])
+    filler = "".join(
+        f'<div class="info"><div class="label">Note {k}</div><div class="text">Extra field {k} of company {i}</div></div>'
+        for k in range(extra))
+    nav = "".join(f'<li><a href="/category/c{k}">Category {k}</a></li>' for k in range(40 + extra * 5))
+    return f"""<html><head><title>Company {i}</title></head><body>
+<div class="hdr"><ul class="menu">{nav}</ul></div>
+<h1 id="company_name">Company {i} LLC</h1>
+<div class="info"><div class="label">Address</div><div class="text location" id="company_address">Baku, street {i}</div></div>
+<div class="info"><div class="label">Contact number</div><div class="text">{phones}</div></div>
+<div class="info"><div class="label">Mobile phone</div><div class="text"><a href="tel:0501234{i % 1000:03d}">050 123 4{i % 1000:03d}</a></div></div>
+<div class="info"><div class="label">Fax</div><div class="text">(012) 555 00 {i % 90 + 10}</div></div>
+<div class="info"><div class="label">Website address</div><div class="text weblinks"><a href="http://c{i}.az">c{i}.az</a></div></div>
+<div class="info"><div class="label">Establishment year</div>{1990 + i % 30}</div>
+<div class="info"><div class="label">Employees</div><div class="text">{i % 50} employees</div></div>
+{filler}
+<div class="footer">{"Lorem ipsum dolor sit amet. " * (20 + extra * 10)}</div></body></html>"""
+
+
+def yp_category(cat, page, per_page=20, pages=3, companies=None):
+    companies = companies or per_page * pages
+    items = "".join(
+        f'<div class="company" data-cmpid="{n}"><h3><a href="/company/{n % companies}/c-{n % companies}">C {n}</a></h3>'
+        f'<p>Short description of company {n}</p></div>'
+        for n in range(cat * per_page * pages + (page - 1) * per_page, cat * per_page * pages + page * per_page))
+    links = "".join(f'<a class="pages_no" href="/category/cat{cat}/{n}">{n}</a>' for n in range(1, pages + 1))
+    nxt = f'<a class="pages_arrow" rel="next" href="/category/cat{cat}/{page + 1}">next</a>' if page < pages else ""
+    return f"<html><body>{items}<div class='pages_container'>{links}{nxt}</div></body></html>"
+
+
+def yp_browse(categories=4):
+    lis = "".join(f'<li><a href="/category/cat{c}">Category {c} <span>(9)</span></a></li>' for c in range(categories))
+    return (f'<html><body><ul class="icats">{lis}'
+            f'<li><div class="icats_empty"></div><a href="/category/empty">Empty</a></li></ul></body></html>')
+
+
+MARSOL_BLOCKS = [
+    '<p><strong>Ünvan:</strong> Bakı şəh., Nizami küç. {i}</p><p><strong>Telefon:</strong> + 994 12 555 {n:02d} 11<br>+994 12 555 {n:02d} 12</p>'
+    '<p><strong>Mobil</strong>: +994 50 222 {n:02d} 33</p><p><strong>E-mail:</strong> <a href="mailto:info{i}@x.az">info{i}@x.az</a></p>',
+    '<ul><li><strong>5. Ünvan</strong> : Gəncə {i}</li><li><strong>Telefon / Mobil:</strong> 012 444 {n:02d} 00</li>'
+    '<li><strong>İnstagram:</strong> shop{i}</li><li><strong>Facebook</strong> : <a href="https://fb.com/p{i}">Səhifə</a> İnstagram: ig{i}</li></ul>',
+    '<p><strong>Telefon</strong><strong>: +994 55 111 {n:02d} 22</strong></p><p><strong>Web:</strong> www.site{i}.az</p>'
+    '<p><strong>+994 55 111 {n:02d} 23</strong></p><p><strong>E-poçt:</strong> <span class="__cf_email__">[email&#160;protected]</span></p>',
+    '<p>Ünvan: Sumqayıt {i}<br>Telefon: 018 000 {n:02d} 00<br>e-mail: contact{i}@gilasoptic.az</p>'
+    '<figure><div class="wp-block-embed__wrapper">https://www.instagram.com/x{i}/</div></figure>',
+]
+
+
+def marsol_partner(i, extra=0):
+    body = MARSOL_BLOCKS[i % len(MARSOL_BLOCKS)].format(i=i, n=i % 100)
+    prose = "".join(f"<p>Paragraph {k} about partner {i}: {'discount terms and conditions ' * 8}</p>"
+                    for k in range(3 + extra * 4))
+    link = f'<h3>Sayta keçid <a href="https://sayt{i}.az">link</a></h3>' if i % 3 == 0 else ""
+    return (f'<html><body><header><p>menu</p></header>'
+            f'<div class="financity-single-article-content">{body}{prose}</div>{link}</body></html>')
+
+
+def marsol_listing(page, base, per_page=12, partners=60):
+    pages = max(1, -(-partners // per_page))
+    cards = "".join(
+        f'<div class="gdlr-core-blog-grid-content-wrap"><h3><a href="{base}/partner/{n}/">Partner {n}</a></h3>'
+        f'<div class="gdlr-core-blog-info-category"><a href="#">Cat {n % 7}</a></div></div>'
+        for n in range((page - 1) * per_page, min(page * per_page, partners)))
+    links = "".join(f'<a href="{base}/partnyorlarimiz/page/{n}/">{n}</a>' for n in range(2, pages + 1))
+    return f"<html><body>{cards}<div class='pagination'>{links}</div></body></html>"
@@ -0,0 +1,71 @@
+import argparse
+import json
+import os
+import sys
+from hashlib import blake2b
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from data_pipeline.sites import azerbaijanyp
+from data_pipeline.transport import make_session
+
+FIXTURES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 "
+                  "(KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
+}
+
+
+# Saves live pages into the benchmark corpus: fixtures/<site>/<hash>.html, plus index.json
+# mapping file name → URL. Re-recording a URL overwrites its file.
+#
+#   python -m bench.record yp https://www.azerbaijanyp.com/company/123/... [...]
+#   python -m bench.record yp --category https://www.azerbaijanyp.com/category/banks --limit 50
+#   python -m bench.record marsol https://marsol.az/partnyorlarimiz/foo/ [...]
+def record(site, urls, session):
+    folder = os.path.join(FIXTURES, site)
+    os.makedirs(folder, exist_ok=True)
+    index_path = os.path.join(folder, "index.json")
+    index = {}
+    if os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as fh:
+            index = json.load(fh)
+    for url in urls:
+        r = session.get(url, timeout=30)
+        r.raise_for_status()
+        name = blake2b(url.encode("utf-8"), digest_size=8).hexdigest() + ".html"
+        with open(os.path.join(folder, name), "wb") as fh:
+            fh.write(r.content)
+        index[name] = url
+        print(f"{site}: {url} → {name} ({len(r.content)} bytes)")
+    with open(index_path, "w", encoding="utf-8") as fh:
+        json.dump(index, fh, ensure_ascii=False, indent=1, sort_keys=True)
+
+
+def category_companies(session, category_url, limit):
+    r = session.get(category_url, timeout=30)
+    r.raise_for_status()
+    soup = azerbaijanyp.make_soup(r.content, azerbaijanyp.CATEGORY_ONLY)
+    return azerbaijanyp.company_links(soup, azerbaijanyp.AzerbaijanYP.base_url)[:limit]
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m bench.record")
+    ap.add_argument("site", choices=["yp", "marsol"])
+    ap.add_argument("urls", nargs="*")
+    ap.add_argument("--category", help="yp: record the companies listed on this category page")
+    ap.add_argument("--limit", type=int, default=50)
+    args = ap.parse_args(argv)
+
+    session = make_session(HEADERS, pool_size=1, verify=args.site != "yp")
+    urls = list(args.urls)
+    if args.category:
+        urls += category_companies(session, args.category, args.limit)
+    if not urls:
+        ap.error("no URLs to record")
+    with session:
+        record(args.site, urls, session)
+
+
+if __name__ == "__main__":
+    main()
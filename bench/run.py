@@ -0,0 +1,289 @@
+import argparse
+import gc
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench import pages
+from bench.record import FIXTURES
+from bench.stub_server import StubSite
+from data_pipeline import Columns, run
+from data_pipeline.sites import azerbaijanyp as yp
+from data_pipeline.sites import marsol
+from data_pipeline.sites.azerbaijanyp import AzerbaijanYP
+from data_pipeline.sites.marsol import Marsol
+
+# Results and the baseline stay on the machine that ran them (bench/results/ is gitignored):
+# timings only compare against runs on the same hardware, so no reference baseline is
+# committed. A fresh checkout has no baseline until a run with --set-baseline; CI that wants
+# a gate keeps its own baseline file and passes it with --baseline.
+RESULTS = os.path.join(ROOT, "bench", "results")
+SUITES = ("parse", "fields", "memory", "pipeline")
+
+
+# Recorded pages (bench.record) first, then `n` synthetic pages and `large` long ones.
+# Before: corpus("yp", 2, 1) with no fixtures → After: [("synthetic/0", url, b"<html>…"), …] (3 pages)
+def corpus(site, n, large):
+    out = []
+    index_path = os.path.join(FIXTURES, site, "index.json")
+    if os.path.exists(index_path):
+        with open(index_path, encoding="utf-8") as fh:
+            for name, url in sorted(json.load(fh).items()):
+                with open(os.path.join(FIXTURES, site, name), "rb") as page:
+                    out.append((f"recorded/{name}", url, page.read()))
+    make = pages.yp_company if site == "yp" else pages.marsol_partner
+    host = "https://www.azerbaijanyp.com/company" if site == "yp" else "https://marsol.az/partner"
+    out += [(f"synthetic/{i}", f"{host}/{i}/", make(i).encode("utf-8")) for i in range(n)]
+    out += [(f"large/{i}", f"{host}/{n + i}/", make(n + i, extra=20).encode("utf-8")) for i in range(large)]
+    return out
+
+
+def best_of(repeat, fn):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+    return min(times)
+
+
+# one untraced call first, so one-time caches (selectors, memoized keys) aren't counted
+def peak_kib(fn):
+    fn()
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 1024
+    finally:
+        tracemalloc.stop()
+
+
+def metric(value, unit, better):
+    return {"value": round(value, 3), "unit": unit, "better": better}
+
+
+def yp_fields():
+    by_label, phones = yp.by_label_text, yp.phones_by_label
+    return [
+        ("company name", lambda soup, labels: yp.clean_text(soup.select_one("#company_name"))
+            or by_label(labels, "Company name")),
+        ("address", lambda soup, labels: yp.clean_text(soup.select_one("#company_address"))
+            or by_label(labels, "Address")),
+        ("contact number", lambda soup, labels: yp.split_contact_three(phones(labels, "Contact number"))),
+        ("mobile phone", lambda soup, labels: phones(labels, "Mobile phone")),
+        ("website address", lambda soup, labels: by_label(labels, "Website address")),
+        ("fax", lambda soup, labels: phones(labels, "Fax")),
+        ("establishment year", lambda soup, labels: by_label(labels, "Establishment year")),
+        ("employees", lambda soup, labels: by_label(labels, "Employees")),
+    ]
+
+
+def bench_yp(docs, suites, repeat):
+    out = {}
+    parse_all = lambda: [yp.parse_company_html(url, html) for _, url, html in docs]
+    if "parse" in suites:
+        out["yp.parse.pages_per_sec"] = metric(len(docs) / best_of(repeat, parse_all), "pages/s", "higher")
+    if "memory" in suites:
+        out["yp.parse.peak_kib"] = metric(peak_kib(parse_all), "KiB", "lower")
+    if "fields" in suites:
+        fields = yp_fields()
+        best = {}
+        for _ in range(repeat):
+            spent = dict.fromkeys(["soup", "label_index"] + [f for f, _ in fields], 0.0)
+            for _, url, html in docs:
+                t = time.perf_counter()
+                soup = yp.make_soup(html, yp.COMPANY_ONLY)
+                t1 = time.perf_counter()
+                labels = yp.label_index(soup)
+                t2 = time.perf_counter()
+                spent["soup"] += t1 - t
+                spent["label_index"] += t2 - t1
+                for name, extract in fields:
+                    t = time.perf_counter()
+                    extract(soup, labels)
+                    spent[name] += time.perf_counter() - t
+            best = {k: min(v, best.get(k, v)) for k, v in spent.items()}
+        for name, total in best.items():
+            out[f"yp.field.{name}.us_per_page"] = metric(total / len(docs) * 1e6, "µs/page", "lower")
+    return out
+
+
+# Peak memory of turning parsed rows into a DataFrame: list of row dicts → DataFrame (the
+# old scripts) against records.Columns → to_pandas(). `docs` is cycled up to `n` rows.
+def bench_rows(docs, n=20_000):
+    parsed = [yp.parse_listed_company(("", f"Category {i % 20}", url), html) for i, (_, url, html) in enumerate(docs)]
+    columns = list(parsed[0])
+
+    def dicts():
+        import pandas as pd
+        return pd.DataFrame([dict(parsed[i % len(parsed)]) for i in range(n)], columns=columns)
+
+    def accumulated():
+        return Columns(columns, AzerbaijanYP.column_types).extend(parsed[i % len(parsed)] for i in range(n)).to_pandas()
+
+    return {
+        "rows.dicts.peak_kib": metric(peak_kib(dicts), "KiB", "lower"),
+        "rows.columns.peak_kib": metric(peak_kib(accumulated), "KiB", "lower"),
+    }
+
+
+def bench_marsol(docs, suites, repeat):
+    out = {}
+    items = [("", "bench", url, f"Partner {i}") for i, (_, url, _) in enumerate(docs)]
+    parse_all = lambda: [marsol.parse_partner_page(item, html) for item, (_, _, html) in zip(items, docs)]
+    if "parse" in suites:
+        out["marsol.parse.pages_per_sec"] = metric(len(docs) / best_of(repeat, parse_all), "pages/s", "higher")
+    if "memory" in suites:
+        out["marsol.parse.peak_kib"] = metric(peak_kib(parse_all), "KiB", "lower")
+    if "fields" in suites:
+        soup = best_of(repeat, lambda: [marsol.make_soup(html, marsol.PARTNER_ONLY) for _, _, html in docs])
+        total = best_of(repeat, parse_all)
+        out["marsol.field.soup.us_per_page"] = metric(soup / len(docs) * 1e6, "µs/page", "lower")
+        out["marsol.field.extract.us_per_page"] = metric(max(0.0, total - soup) / len(docs) * 1e6,
+                                                         "µs/page", "lower")
+    return out
+
+
+# End to end against the stub server: fetch engine, cache, parse pool and sinks included.
+# Rate limits are lifted so the numbers measure the pipeline, not the politeness settings;
+# the stub's latency stands in for the real servers.
+UNLIMITED = {"requests_per_sec": 1000.0, "max_requests_per_sec": 1000.0, "burst": 64}
+
+
+# Before: run(AzerbaijanYP, stub) → After: (requests made, rows parsed, seconds)
+def bench_site_pipeline(site_cls, stub, base):
+    logging.getLogger("data_pipeline").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as tmp:
+        site = site_cls(base_url=base, output_path=os.path.join(tmp, "out.xlsx"),
+                        state_path=os.path.join(tmp, "state.db"), history_path=os.path.join(tmp, "history.db"),
+                        http2=False, **UNLIMITED)
+        hits = stub.hits
+        t = time.perf_counter()
+        run(site, cache_path=os.path.join(tmp, "cache.db"), metrics_path=os.path.join(tmp, "metrics.jsonl"))
+        elapsed = time.perf_counter() - t
+        with open(os.path.join(tmp, "out.partial.jsonl"), encoding="utf-8") as fh:
+            rows = sum(1 for _ in fh)
+    return stub.hits - hits, rows, elapsed
+
+
+def bench_yp_pipeline(stub, base):
+    requests, rows, elapsed = bench_site_pipeline(AzerbaijanYP, stub, base)
+    return {
+        "yp.pipeline.requests_per_sec": metric(requests / elapsed, "req/s", "higher"),
+        "yp.pipeline.rows_per_sec": metric(rows / elapsed, "rows/s", "higher"),
+    }
+
+
+def bench_marsol_pipeline(stub, base):
+    _, rows, elapsed = bench_site_pipeline(Marsol, stub, base)
+    return {"marsol.pipeline.rows_per_sec": metric(rows / elapsed, "rows/s", "higher")}
+
+
+def commit_id():
+    try:
+        return subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+# Before: baseline 100 pages/s, current 85 pages/s, threshold 0.1 → After: one regression
+def regressions(baseline, current, threshold):
+    found = []
+    for name, cur in current.items():
+        base = baseline.get(name)
+        if not base or not base["value"]:
+            continue
+        change = (cur["value"] - base["value"]) / base["value"]
+        if (change < -threshold) if cur["better"] == "higher" else (change > threshold):
+            found.append((name, base["value"], cur["value"], change))
+    return found
+
+
+def report(result, baseline=None):
+    metrics = result["metrics"]
+    base = (baseline or {}).get("metrics", {})
+    width = max(len(k) for k in metrics)
+    print(f"commit {result['commit']}  python {result['python']}  corpus {result['corpus']}")
+    for name, m in metrics.items():
+        line = f"{name:<{width}}  {m['value']:>12,.1f} {m['unit']}"
+        if name in base and base[name]["value"]:
+            line += f"   ({(m['value'] - base[name]['value']) / base[name]['value']:+.1%} vs {baseline['commit']})"
+        print(line)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m bench")
+    ap.add_argument("--suites", default=",".join(SUITES), help=f"comma-separated subset of {','.join(SUITES)}")
+    ap.add_argument("--pages", type=int, default=200, help="synthetic pages per site")
+    ap.add_argument("--large", type=int, default=20, help="long synthetic pages per site")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--latency", type=float, default=0.02, help="stub server latency, seconds")
+    ap.add_argument("--jitter", type=float, default=0.005)
+    ap.add_argument("--baseline", default=os.path.join(RESULTS, "baseline.json"),
+                    help="results to compare against (local to this machine, see RESULTS)")
+    ap.add_argument("--threshold", type=float, default=0.10, help="allowed relative slowdown")
+    ap.add_argument("--set-baseline", action="store_true", help="store this run as the baseline")
+    ap.add_argument("--no-save", action="store_true")
+    args = ap.parse_args(argv)
+    suites = set(args.suites.split(","))
+
+    yp_docs = corpus("yp", args.pages, args.large)
+    marsol_docs = corpus("marsol", args.pages, args.large)
+    metrics = {}
+    metrics.update(bench_yp(yp_docs, suites, args.repeat))
+    metrics.update(bench_marsol(marsol_docs, suites, args.repeat))
+    if "memory" in suites:
+        metrics.update(bench_rows(yp_docs))
+    if "pipeline" in suites:
+        # ~args.pages listings over 4 categories, a fifth of them listed in two categories
+        listings = 4 * 20 * max(1, round(args.pages / 80))
+        with StubSite(args.latency, args.jitter, categories=4, per_page=20, pages=listings // 80,
+                      companies=listings * 4 // 5, partners=args.pages) as stub:
+            base = stub.start()
+            metrics.update(bench_yp_pipeline(stub, base))
+            metrics.update(bench_marsol_pipeline(stub, base))
+
+    result = {
+        "commit": commit_id(),
+        "at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "corpus": {"yp": len(yp_docs), "marsol": len(marsol_docs)},
+        "metrics": metrics,
+    }
+    baseline = None
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as fh:
+            baseline = json.load(fh)
+        if baseline.get("corpus") != result["corpus"]:
+            print(f"note: baseline corpus {baseline.get('corpus')} differs from this run's")
+    elif not args.set_baseline:
+        print(f"note: no baseline at {args.baseline}, nothing to compare (store one with --set-baseline)")
+    report(result, baseline)
+
+    if not args.no_save:
+        os.makedirs(RESULTS, exist_ok=True)
+        path = os.path.join(RESULTS, f"{time.strftime('%Y%m%d-%H%M%S')}-{result['commit']}.json")
+        for target in [path] + ([args.baseline] if args.set_baseline else []):
+            with open(target, "w", encoding="utf-8") as fh:
+                json.dump(result, fh, ensure_ascii=False, indent=1)
+        print(f"saved {path}")
+
+    if baseline and not args.set_baseline:
+        found = regressions(baseline["metrics"], metrics, args.threshold)
+        for name, old, new, change in found:
+            print(f"REGRESSION {name}: {old:,.1f} → {new:,.1f} ({change:+.1%})")
+        return 1 if found else 0
+    return 0
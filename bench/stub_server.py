@@ -0,0 +1,85 @@
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from bench import pages
+
+
+# Local stand-in for both sites, serving bench.pages with a simulated server latency
+# (latency ± jitter seconds per response). Routes:
+#   /browse-business-directory, /category/cat<c>[/<page>], /company/<n>/...   (azerbaijanyp)
+#   /partnyorlarimiz/[page/<n>/], /partner/<n>/                               (marsol)
+class StubSite:
+    def __init__(self, latency=0.02, jitter=0.0, categories=4, per_page=20, pages=3, companies=None, partners=60,
+                 extra=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.categories = categories
+        self.per_page = per_page
+        self.pages = pages
+        self.companies = companies  # fewer than categories*per_page*pages: some listed twice
+        self.partners = partners
+        self.extra = extra
+        self.hits = 0
+        self.server = None
+
+    def page(self, path, base):
+        parts = path.split("?")[0].strip("/").split("/")
+        if parts[0] == "browse-business-directory":
+            return pages.yp_browse(self.categories)
+        if parts[0] == "category" and len(parts) > 1 and parts[1].startswith("cat"):
+            page = int(parts[2]) if len(parts) > 2 else 1
+            return pages.yp_category(int(parts[1][3:]), page, self.per_page, self.pages, self.companies)
+        if parts[0] == "company" and len(parts) > 1:
+            return pages.yp_company(int(parts[1]), self.extra)
+        if parts[0] == "partnyorlarimiz":
+            return pages.marsol_listing(int(parts[2]) if len(parts) > 2 else 1, base, partners=self.partners)
+        if parts[0] == "partner" and len(parts) > 1:
+            return pages.marsol_partner(int(parts[1]), self.extra)
+        return None
+
+    def handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                site.hits += 1
+                time.sleep(max(0.0, site.latency + random.uniform(-site.jitter, site.jitter)))
+                body = site.page(self.path, f"http://{self.headers['Host']}")
+                if body is None:
+                    self.send_response(404)
+                    self.send_header("Content-Length", "0")
+                    self.end_headers()
+                    return
+                data = body.encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+    # Before: StubSite().start() → After: "http://127.0.0.1:<free port>", serving in a daemon thread
+    def start(self, port=0):
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self.handler())
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
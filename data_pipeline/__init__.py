@@ -0,0 +1,5 @@
+from .consolidate import consolidate
+from .pipeline import load_rows, run
+from .records import Columns, Record, record_type
+from .site import Site
+from .sites import SITES
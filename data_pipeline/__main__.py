@@ -0,0 +1,7 @@
+import sys
+
+from .cli import main
+
+# guarded: the distributed mode's spawned workers import this module again
+if __name__ == "__main__":
+    sys.exit(main())
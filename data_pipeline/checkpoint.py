@@ -0,0 +1,273 @@
+import json
+import sqlite3
+import threading
+from itertools import groupby
+
+from .frontier import UrlFrontier, canonicalize_url
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    url   TEXT PRIMARY KEY,
+    grp   TEXT,
+    pos   INTEGER,
+    done  INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS category_pages (
+    category_url TEXT PRIMARY KEY,
+    page_no      INTEGER NOT NULL,
+    next_url     TEXT
+);
+CREATE TABLE IF NOT EXISTS listing_pages (
+    category_url TEXT NOT NULL,
+    page_no      INTEGER NOT NULL,
+    url          TEXT NOT NULL,
+    fetched      INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (category_url, page_no)
+);
+CREATE TABLE IF NOT EXISTS companies (
+    category_url TEXT NOT NULL,
+    url          TEXT NOT NULL,
+    pos          INTEGER,
+    status       TEXT NOT NULL DEFAULT 'queued',
+    error        TEXT,
+    data         TEXT,
+    item         TEXT,
+    PRIMARY KEY (category_url, url)
+);
+CREATE TABLE IF NOT EXISTS company_categories (
+    url          TEXT NOT NULL,
+    category_url TEXT NOT NULL,
+    PRIMARY KEY (url, category_url)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS seen_urls (
+    hash INTEGER PRIMARY KEY
+);
+"""
+
+
+# Durable crawl state: categories, pagination progress per category, queued company URLs
+# and parsed rows all live in one SQLite file, so a restarted run skips finished work.
+#
+# Company URLs are canonicalized and queued once across all categories (under the first
+# category that lists them); every category a company appears in is kept in
+# company_categories and joined back onto its row by iter_rows.
+class CrawlState:
+    def __init__(self, path, frontier_capacity=2_000_000):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # state files from before failed pages kept their item
+        if "item" not in {r[1] for r in self.conn.execute("PRAGMA table_info(companies)")}:
+            self.conn.execute("ALTER TABLE companies ADD COLUMN item TEXT")
+        self.lock = threading.RLock()
+        self.frontier = UrlFrontier(self, capacity=frontier_capacity)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def _write(self, sql, params=()):
+        with self.lock, self.conn:
+            return self.conn.execute(sql, params)
+
+    def _read(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    # categories
+    def save_categories(self, categories):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO categories (url, grp, pos) VALUES (?, ?, ?)",
+                [(c["url"], c["group"], i) for i, c in enumerate(categories)],
+            )
+
+    def load_categories(self):
+        return [{"group": g, "url": u}
+                for u, g in self._read("SELECT url, grp FROM categories ORDER BY pos")]
+
+    def category_done(self, category_url):
+        rows = self._read("SELECT done FROM categories WHERE url = ?", (category_url,))
+        return bool(rows and rows[0][0])
+
+    def mark_category_done(self, category_url):
+        self._write("UPDATE categories SET done = 1 WHERE url = ?", (category_url,))
+
+    # pagination: (page_no, next_url) of the last page read; next_url None means finished
+    def page_progress(self, category_url):
+        rows = self._read("SELECT page_no, next_url FROM category_pages WHERE category_url = ?",
+                          (category_url,))
+        return rows[0] if rows else None
+
+    def save_page(self, category_url, page_no, next_url, company_urls):
+        with self.lock, self.conn:
+            self._add_companies(category_url, company_urls)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO category_pages (category_url, page_no, next_url) VALUES (?, ?, ?)",
+                (category_url, page_no, next_url),
+            )
+
+    # pagination read many pages at a time: {page_no: (url, fetched)} of the listing pages
+    # known so far; a round marks the pages it read and adds those they linked to
+    def listing_pages(self, category_url):
+        return {n: (u, bool(f)) for n, u, f in self._read(
+            "SELECT page_no, url, fetched FROM listing_pages WHERE category_url = ?", (category_url,))}
+
+    def save_listing_pages(self, category_url, fetched, found):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO listing_pages (category_url, page_no, url, fetched) VALUES (?, ?, ?, 1)",
+                [(category_url, n, u) for n, u in fetched.items()])
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO listing_pages (category_url, page_no, url) VALUES (?, ?, ?)",
+                [(category_url, n, u) for n, u in found.items()])
+
+    # companies
+    def add_companies(self, category_url, company_urls):
+        with self.lock, self.conn:
+            self._add_companies(category_url, company_urls)
+
+    def _add_companies(self, category_url, company_urls):
+        urls = [canonicalize_url(u) for u in company_urls]
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO company_categories (url, category_url) VALUES (?, ?)",
+            [(u, category_url) for u in urls],
+        )
+        new = [u for u in urls if self.frontier.add(u)]
+        start = self.conn.execute("SELECT COUNT(*) FROM companies WHERE category_url = ?",
+                                  (category_url,)).fetchone()[0]
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO companies (category_url, url, pos) VALUES (?, ?, ?)",
+            [(category_url, u, start + i) for i, u in enumerate(new)],
+        )
+
+    # storage for frontier.UrlFrontier; called with self.lock held via _add_companies
+    def seen_hashes(self):
+        for (h,) in self.conn.execute("SELECT hash FROM seen_urls"):
+            yield h
+
+    def seen_contains(self, h):
+        return self.conn.execute("SELECT 1 FROM seen_urls WHERE hash = ?", (h,)).fetchone() is not None
+
+    def seen_add(self, h):
+        self.conn.execute("INSERT OR IGNORE INTO seen_urls (hash) VALUES (?)", (h,))
+
+    def company_urls(self, category_url):
+        return [u for (u,) in self._read(
+            "SELECT url FROM companies WHERE category_url = ? ORDER BY pos", (category_url,))]
+
+    def pending_companies(self, category_url):
+        return [u for (u,) in self._read(
+            "SELECT url FROM companies WHERE category_url = ? AND status != 'done' ORDER BY pos",
+            (category_url,))]
+
+    def save_row(self, category_url, url, row):
+        self._write(
+            "UPDATE companies SET status = 'done', error = NULL, data = ? WHERE category_url = ? AND url = ?",
+            (json.dumps(dict(row), ensure_ascii=False), category_url, url),
+        )
+
+    # `item` is kept for the retry pass, which would otherwise rebuild it with site.item()
+    def mark_failed(self, category_url, url, error, item=None):
+        self._write(
+            "UPDATE companies SET status = 'failed', error = ?, item = ? WHERE category_url = ? AND url = ?",
+            (str(error), item and json.dumps(list(item), ensure_ascii=False), category_url, url),
+        )
+
+    # a run cut short by its budget: pages it didn't reach keep the row of the last run that
+    # fetched them ('stale'), in the output but still pending for the next run
+    def queued_companies(self):
+        return self._read("SELECT category_url, url FROM companies WHERE status = 'queued' ORDER BY category_url, pos")
+
+    def save_stale(self, rows):
+        with self.lock, self.conn:
+            self.conn.executemany(
+                "UPDATE companies SET status = 'stale', data = ? WHERE category_url = ? AND url = ? AND status = 'queued'",
+                [(json.dumps(dict(row), ensure_ascii=False), cat, url) for cat, url, row in rows],
+            )
+
+    # Before: DeadLetterQueue items of the last run, [category_url, group, url, ...] → After: those
+    # not done here marked failed, for the retry pass, with their item where the page is still
+    # under the same category. A page or category discovery didn't list again (after --fresh) is
+    # queued back under its old category, added at the end.
+    def requeue_failed(self, items, error="failed on an earlier run"):
+        with self.lock, self.conn:
+            start = self.conn.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM categories").fetchone()[0]
+            self.conn.executemany("INSERT OR IGNORE INTO categories (url, grp, pos) VALUES (?, ?, ?)",
+                                  [(item[0], item[1], start + i) for i, item in enumerate(items)])
+            for item in items:
+                self._add_companies(item[0], [item[2]])
+            self.conn.executemany(
+                "UPDATE companies SET status = 'failed', error = ?1, "
+                "item = CASE WHEN category_url = ?2 THEN ?3 END WHERE url = ?4 AND status = 'queued'",
+                [(error, item[0], json.dumps(list(item), ensure_ascii=False), canonicalize_url(item[2]))
+                 for item in items],
+            )
+
+    # dead letters: {category_url: [(url, item or None), ...]} of companies whose last attempt failed
+    def failed_companies(self):
+        out = {}
+        for cat_url, url, item in self._read(
+                "SELECT category_url, url, item FROM companies WHERE status = 'failed' ORDER BY category_url, pos"):
+            out.setdefault(cat_url, []).append((url, item and tuple(json.loads(item))))
+        return out
+
+    # Merge: the parsed rows of another state file (a distributed worker's partition) are
+    # added after the ones already here. Its groups join the end of the group list; a page
+    # already present from an earlier partition keeps its row and gains the new groups.
+    def absorb(self, path):
+        with self.lock:
+            self.conn.execute("CREATE INDEX IF NOT EXISTS companies_url ON companies (url)")
+            self.conn.execute("ATTACH DATABASE ? AS part", (path,))
+            try:
+                with self.conn:
+                    start = self.conn.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM categories").fetchone()[0]
+                    self.conn.execute(
+                        "INSERT OR IGNORE INTO categories (url, grp, pos, done) "
+                        "SELECT url, grp, ? + pos, done FROM part.categories", (start,))
+                    self.conn.execute("INSERT OR IGNORE INTO company_categories SELECT * FROM part.company_categories")
+                    for (cat,) in self.conn.execute("SELECT DISTINCT category_url FROM part.companies").fetchall():
+                        offset = self.conn.execute("SELECT COALESCE(MAX(pos) + 1, 0) FROM companies "
+                                                   "WHERE category_url = ?", (cat,)).fetchone()[0]
+                        self.conn.execute(
+                            "INSERT OR IGNORE INTO companies (category_url, url, pos, status, data) "
+                            "SELECT p.category_url, p.url, ? + p.pos, p.status, p.data FROM part.companies p "
+                            "WHERE p.category_url = ? AND p.status = 'done' "
+                            "AND NOT EXISTS (SELECT 1 FROM main.companies m WHERE m.url = p.url)", (offset, cat))
+            finally:
+                self.conn.execute("DETACH DATABASE part")
+
+    # parsed rows, `group_column` ("category") holding every category the company is listed
+    # in ("A; B"); group_column=None leaves rows as parsed
+    def iter_rows(self, group_column="category"):
+        # one line per (company, category), categories in list order; group_concat over an
+        # ordered subquery doesn't promise to keep that order, so the join happens here
+        for _, lines in groupby(self._row_lines(), key=lambda line: line[0]):
+            lines = list(lines)
+            row = json.loads(lines[0][1])
+            groups = "; ".join(grp for _, _, grp in lines if grp)
+            if groups and group_column:
+                row[group_column] = groups
+            yield row
+
+    def _row_lines(self):
+        with self.lock:
+            cur = self.conn.execute(
+                "SELECT c.rowid, c.data, g.grp FROM companies c JOIN categories k ON k.url = c.category_url "
+                "LEFT JOIN company_categories l ON l.url = c.url LEFT JOIN categories g ON g.url = l.category_url "
+                "WHERE c.status IN ('done', 'stale') ORDER BY k.pos, c.pos, c.rowid, g.pos"
+            )
+            rows = cur.fetchmany(1000)
+        while rows:
+            yield from rows
+            with self.lock:
+                rows = cur.fetchmany(1000)
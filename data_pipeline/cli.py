@@ -0,0 +1,149 @@
+import argparse
+import ast
+import glob
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from . import distributed, metrics
+from .consolidate import consolidate
+from .pipeline import run, sibling_path
+from .sites import SITES
+from .workqueue import open_queue
+
+
+# Before: "azerbaijanyp.max_concurrency=32" → After: ("azerbaijanyp", "max_concurrency", 32)
+def parse_setting(text):
+    key, _, value = text.partition("=")
+    site, _, name = key.partition(".")
+    if not name or not value:
+        raise argparse.ArgumentTypeError(f"expected SITE.SETTING=VALUE, got {text!r}")
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+    return site, name, value
+
+
+# python -m data_pipeline azerbaijanyp marsol --parallel
+# python -m data_pipeline marsol --offline --set marsol.output_path=partners.csv
+# python -m data_pipeline --fresh --delta-only          (weekly refresh: only what changed)
+# python -m data_pipeline --fresh --budget-seconds 900  (daily: the pages most likely to have changed)
+# python -m data_pipeline marsol --consolidate 'runs/*/partners13.xlsx' --into partners_all.parquet
+#
+# Distributed: a coordinator, workers on this and other hosts, and a merge at the end
+# python -m data_pipeline --queue redis://queue-host/0 --parts /shared/parts --fresh --workers 4
+# python -m data_pipeline --queue redis://queue-host/0 --parts /shared/parts --role worker --workers 4
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m data_pipeline")
+    ap.add_argument("sites", nargs="*", metavar="SITE", help=f"one or more of: {', '.join(SITES)} (default: all)")
+    ap.add_argument("--parallel", action="store_true", help="run the sites at the same time")
+    ap.add_argument("--fresh", action="store_true", help="forget saved crawl state and start over")
+    ap.add_argument("--delta-only", action="store_true",
+                    help="write only the changes since the last run (<output>.delta.<ext>), not the full output")
+    ap.add_argument("--offline", action="store_true", help="replay pages from the HTTP cache only")
+    ap.add_argument("--prioritize", action="store_true",
+                    help="fetch pages by category weight and how likely they changed since last fetched")
+    ap.add_argument("--budget-seconds", type=float, help="stop fetching after this long (implies --prioritize)")
+    ap.add_argument("--budget-requests", type=int,
+                    help="stop fetching pages after this many requests; listing/discovery requests are not "
+                         "counted (implies --prioritize)")
+    ap.add_argument("--cache", default="http_cache.db")
+    ap.add_argument("--cache-ttl", type=float, default=24 * 3600, help="seconds a cached page is served as is")
+    ap.add_argument("--metrics-port", type=int, help="serve Prometheus metrics on this port")
+    ap.add_argument("--metrics-every", type=float, default=30, help="seconds between JSON metric snapshots")
+    ap.add_argument("--profile-sample", type=float, default=0.0, help="share of pages to profile, e.g. 0.01")
+    ap.add_argument("--profile-dir", default="profiles")
+    ap.add_argument("--profile-tool", choices=["cprofile", "pyinstrument"], default="cprofile",
+                    help="profiler for --profile-sample: .prof dumps, or .html with pyinstrument (if installed)")
+    ap.add_argument("--queue", metavar="URL",
+                    help="crawl through a shared work queue: sqlite:///crawl_queue.db or redis://host:6379/0")
+    ap.add_argument("--role", choices=["all", "coordinator", "worker", "merge"], default="all",
+                    help="with --queue: which part to play; 'all' coordinates, works and merges")
+    ap.add_argument("--workers", type=int, default=2, help="with --queue: worker processes on this host")
+    ap.add_argument("--parts", default="parts", help="with --queue: partition directory shared by the workers")
+    ap.add_argument("--lease", type=float, default=300, help="with --queue: seconds a claimed task stays leased")
+    ap.add_argument("--consolidate", nargs="+", metavar="FILE",
+                    help="instead of crawling, merge these outputs of earlier runs (globs ok, oldest first) into "
+                         "one deduplicated file")
+    ap.add_argument("--into", metavar="PATH",
+                    help="with --consolidate: output file (default <output>.consolidated.parquet)")
+    ap.add_argument("--normalize-phones", action="store_true",
+                    help="with --consolidate: write the site's phone columns as +994 numbers")
+    ap.add_argument("--set", type=parse_setting, action="append", default=[], metavar="SITE.SETTING=VALUE",
+                    help="override a site adapter setting, e.g. azerbaijanyp.max_concurrency=32")
+    args = ap.parse_args(argv)
+
+    names = args.sites or list(SITES)
+    unknown = [n for n in names + [s for s, _, _ in args.set] if n not in SITES]
+    if unknown:
+        ap.error(f"unknown site(s): {', '.join(sorted(set(unknown)))}")
+    if args.queue and (args.budget_seconds is not None or args.budget_requests is not None):
+        ap.error("--budget-seconds / --budget-requests apply to local runs, not --queue")
+    settings = {n: {k: v for s, k, v in args.set if s == n} for n in names}
+    sites = [SITES[n](**settings[n]) for n in names]
+
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+        handlers=[logging.StreamHandler(sys.stdout)],
+    )
+    log = logging.getLogger("data_pipeline")
+    if args.metrics_port:
+        metrics.serve(args.metrics_port)
+        log.info(f"Metrics on http://127.0.0.1:{args.metrics_port}/metrics")
+
+    if args.consolidate:
+        if len(sites) != 1:
+            ap.error("--consolidate takes one site")
+        site = sites[0]
+        inputs = [f for pattern in args.consolidate for f in sorted(glob.glob(pattern)) or [pattern]]
+        consolidate(site, inputs, args.into or sibling_path(site.output_path, ".consolidated.parquet"),
+                    workers=site.parse_workers, normalize_phones=args.normalize_phones)
+        return 0
+    if args.queue:
+        return run_distributed(args, names, sites, settings, log)
+
+    def run_site(site):
+        return run(site, cache_path=args.cache, cache_ttl=args.cache_ttl, offline=args.offline,
+                   fresh=args.fresh, metrics_every=args.metrics_every,
+                   profile_sample=args.profile_sample, profile_dir=args.profile_dir, profile_tool=args.profile_tool,
+                   snapshot=not args.delta_only, prioritize=args.prioritize,
+                   budget_seconds=args.budget_seconds, budget_requests=args.budget_requests)
+
+    failed = 0
+    with ThreadPoolExecutor(max_workers=len(sites) if args.parallel else 1) as pool:
+        for site, fut in [(s, pool.submit(run_site, s)) for s in sites]:
+            try:
+                fut.result()
+            except Exception:
+                failed += 1
+                log.exception(f"{site.name} failed")
+    return 1 if failed else 0
+
+
+def run_distributed(args, names, sites, settings, log):
+    failed = 0
+    queues = {site.name: open_queue(args.queue, site.name, args.lease) for site in sites}
+    if args.role in ("all", "coordinator"):
+        for site in sites:
+            try:
+                distributed.coordinate(site, settings[site.name], queues[site.name], args.parts, fresh=args.fresh,
+                                       cache_path=args.cache, cache_ttl=args.cache_ttl, offline=args.offline)
+            except Exception:
+                failed += 1
+                log.exception(f"{site.name}: coordinator failed")
+    if args.role in ("all", "worker"):
+        failed += distributed.run_workers(args.workers, args.queue, names, args.parts, args.lease,
+                                          cache_ttl=args.cache_ttl, offline=args.offline,
+                                          metrics_every=args.metrics_every, profile_sample=args.profile_sample,
+                                          profile_dir=args.profile_dir, profile_tool=args.profile_tool,
+                                          prioritize=args.prioritize)
+    if args.role in ("all", "merge"):
+        for site in sites:
+            try:
+                distributed.merge(site, queues[site.name], args.parts, snapshot=not args.delta_only)
+            except Exception:
+                failed += 1
+                log.exception(f"{site.name}: merge failed")
+    return 1 if failed else 0
@@ -0,0 +1,346 @@
+import json
+import logging
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from .frontier import canonicalize_url, url_hash
+from .sinks import open_sink
+
+# Consolidation of many output files (the snapshots and partial files of earlier runs,
+# distributed partitions, ...) into one deduplicated dataset, out of core and on all cores.
+# Built on pyarrow; the data goes through Arrow IPC files in a temp directory, one stage at a
+# time, so memory holds one bucket or block rather than the whole dataset:
+#   read     each input in batches: strings trimmed, "" → null, the canonical URL and a
+#            name/phone key computed, rows stamped with their position (file, row)
+#   urls     rows bucketed by URL hash; per URL the last row wins. Only files with a url column
+#            take part: marsol outputs, and for azerbaijanyp (whose output has no url column)
+#            only the partial and delta files; its snapshots are matched by contact alone
+#   contacts survivors bucketed by name/phone key; per key the last row wins
+#   write    survivors back in input order, block by block, cast to site.column_types (and
+#            the phone columns normalized, with normalize_phones)
+# "Last" is by input order: list files oldest first and the newest run's row is kept.
+
+ROW_BITS = 40  # _order = file index << ROW_BITS | row in file
+BLOCK_ROWS = 1_000_000
+BUCKET_BYTES = 32 * 1024 ** 2  # input bytes per dedup bucket
+
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.compute as pc
+    except ImportError as e:
+        raise ImportError("Consolidating outputs needs pyarrow: pip install pyarrow") from e
+    return pa, pc
+
+
+def _strings(pa, rows, columns):
+    return pa.table({c: pa.array([None if r.get(c) is None else str(r.get(c)) for r in rows], pa.string())
+                     for c in columns})
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _jsonl_rows(path):
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _xlsx_rows(path):
+    from openpyxl import load_workbook
+
+    wb = load_workbook(path, read_only=True)
+    try:
+        rows = wb.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, ())
+        for values in rows:
+            yield dict(zip(header, values))
+    finally:
+        wb.close()
+
+
+FORMATS = (".csv", ".jsonl", ".parquet", ".xlsx")
+
+
+# Before: any sink's file (.csv / .jsonl / .parquet / .xlsx) → After: tables of `columns`, all
+# strings, missing columns null
+def read_batches(path, columns, batch_rows=100_000):
+    pa, pc = _arrow()
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".parquet":
+        import pyarrow.parquet as pq
+
+        f = pq.ParquetFile(path)
+        present = [c for c in columns if c in f.schema_arrow.names]
+        for batch in f.iter_batches(batch_rows, columns=present):
+            t = pa.Table.from_batches([batch])
+            yield pa.table({c: pc.cast(t[c], pa.string()) if c in present else pa.nulls(len(t), pa.string())
+                            for c in columns})
+    elif ext == ".csv":
+        from pyarrow import csv
+
+        reader = csv.open_csv(path, convert_options=csv.ConvertOptions(
+            column_types={c: pa.string() for c in columns}, include_columns=columns, include_missing_columns=True))
+        for batch in reader:
+            yield pa.Table.from_batches([batch])
+    else:
+        rows = _jsonl_rows(path) if ext == ".jsonl" else _xlsx_rows(path)
+        for chunk in _chunks(rows, batch_rows):
+            yield _strings(pa, chunk, columns)
+
+
+# Before: " Company 5  LLC " / "+994 12 555 44 33, 050 111 22 33" → After: "company 5 llc" /
+# "+994125554433" (first number, as phones.normalize_az_phone_series writes it); null where
+# either part is missing
+def contact_key(pa, pc, t, name_column, phone_columns):
+    from .phones import normalize_az_phone_series
+
+    if not name_column or not phone_columns:
+        return pa.nulls(len(t), pa.string())
+    name = pc.utf8_trim_whitespace(pc.replace_substring_regex(pc.utf8_lower(t[name_column]), r"[\W_]+", " "))
+    phones = []
+    for c in phone_columns:
+        first = pc.utf8_trim_whitespace(pc.list_element(pc.split_pattern_regex(t[c], r"[,;]"), 0))
+        phones.append(pa.array(normalize_az_phone_series(first.to_pandas()), pa.string(), from_pandas=True))
+    phone = pc.coalesce(*phones)
+    return pc.binary_join_element_wise(pc.if_else(pc.equal(name, ""), pa.scalar(None, pa.string()), name),
+                                       phone, "\x1f")
+
+
+def _normalize(pa, pc, t, spec, file_index, start):
+    columns, url_column, name_column, phone_columns = spec
+    null = pa.scalar(None, pa.string())
+    t = pa.table({c: pc.if_else(pc.equal(col, ""), null, col)
+                  for c, col in ((c, pc.utf8_trim_whitespace(t[c])) for c in columns)})
+    urls = [canonicalize_url(u) if u else None
+            for u in (t[url_column].to_pylist() if url_column else [None] * len(t))]
+    ckeys = contact_key(pa, pc, t, name_column, phone_columns).to_pylist()
+    return (t.append_column("_url", pa.array(urls, pa.string()))
+            .append_column("_ukey", pa.array([url_hash(u) if u else None for u in urls], pa.int64()))
+            .append_column("_ckey", pa.array([url_hash(k) if k else None for k in ckeys], pa.int64()))
+            .append_column("_order", pa.array(range(file_index << ROW_BITS | start,
+                                                    (file_index << ROW_BITS | start) + len(t)), pa.int64())))
+
+
+class _Parts:
+    def __init__(self, folder, name):
+        self.folder = folder
+        self.name = name
+        self.writers = {}
+
+    def write(self, part, table):
+        pa, _ = _arrow()
+        if part not in self.writers:
+            os.makedirs(os.path.join(self.folder, str(part)), exist_ok=True)
+            sink = pa.OSFile(os.path.join(self.folder, str(part), f"{self.name}.arrow"), "wb")
+            self.writers[part] = (sink, pa.ipc.new_file(sink, table.schema))
+        self.writers[part][1].write_table(table)
+
+    def close(self):
+        for sink, writer in self.writers.values():
+            writer.close()
+            sink.close()
+
+
+# Before: table, part number per row → After: each part's rows written to folder/<part>/
+def _scatter(table, parts, out):
+    import numpy as np
+
+    order = np.argsort(parts, kind="stable")
+    table, parts = table.take(order), parts[order]
+    bounds = np.flatnonzero(np.diff(parts)) + 1
+    for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(parts)]):
+        if hi > lo:
+            out.write(int(parts[lo]), table.slice(lo, hi - lo))
+
+
+# rows without a key are spread by position
+def _bucket(table, key, buckets):
+    import numpy as np
+    import pyarrow.compute as pc
+
+    keys = pc.fill_null(table[key], 0).to_numpy()
+    valid = table[key].is_valid().to_numpy(zero_copy_only=False)
+    return np.where(valid, keys, table["_order"].to_numpy()) % buckets
+
+
+def _block(table, bounds):
+    import numpy as np
+
+    return np.searchsorted(bounds, table["_order"].to_numpy(), side="right")
+
+
+def _read_part(folder):
+    pa, _ = _arrow()
+    tables = [pa.ipc.open_file(pa.memory_map(os.path.join(folder, f))).read_all()
+              for f in sorted(os.listdir(folder))]
+    return pa.concat_tables(tables) if tables else None
+
+
+# stage "read": a share of the inputs into URL buckets; returns {file index: rows}
+def _read_stage(files, spec, tmp, buckets, batch_rows):
+    pa, pc = _arrow()
+    out = _Parts(os.path.join(tmp, "urls"), f"in{files[0][0]}")
+    counts = {}
+    try:
+        for file_index, path in files:
+            start = 0
+            for t in read_batches(path, spec[0], batch_rows):
+                t = _normalize(pa, pc, t, spec, file_index, start)
+                start += len(t)
+                _scatter(t, _bucket(t, "_ukey", buckets), out)
+            counts[file_index] = start
+    finally:
+        out.close()
+    return counts
+
+
+# stages "urls" and "contacts": per key the row with the highest _order, keyless rows kept;
+# the survivors go on to the next stage's parts. Returns (rows in, rows kept).
+def _dedup_stage(folder, key, out_folder, name, parts_of):
+    pa, pc = _arrow()
+    t = _read_part(folder)
+    if t is None:
+        return 0, 0
+    keyed = t.filter(pc.is_valid(t[key]))
+    last = keyed.group_by(key).aggregate([("_order", "max")])["_order_max"]
+    kept = t.filter(pc.or_(pc.is_null(t[key]), pc.is_in(t["_order"], value_set=last)))
+    out = _Parts(out_folder, name)
+    try:
+        _scatter(kept, parts_of(kept), out)
+    finally:
+        out.close()
+    return len(t), len(kept)
+
+
+# Before: rows per file {0: 2_500_000, 1: 300} → After: _order values where a new block of
+# BLOCK_ROWS input rows starts, for the final write in input order
+def block_bounds(counts, block_rows=BLOCK_ROWS):
+    bounds, filled = [], 0
+    for file_index in sorted(counts):
+        row, n = 0, counts[file_index]
+        while filled + n - row >= block_rows:
+            row += block_rows - filled
+            bounds.append(file_index << ROW_BITS | row)
+            filled = 0
+        filled += n - row
+    return bounds
+
+
+def arrow_type(pa, kind):
+    if kind == "category":
+        return pa.dictionary(pa.int32(), pa.string())
+    return {int: pa.int64(), float: pa.float64()}.get(kind, pa.string())
+
+
+# Before: "10 employees" in an int column → After: null (only whole numbers convert)
+def _cast(pa, pc, col, kind):
+    if kind == "category":
+        return pc.dictionary_encode(col)
+    if kind in (int, float):
+        pattern = r"^-?\d+$" if kind is int else r"^-?\d+(\.\d+)?$"
+        col = pc.if_else(pc.match_substring_regex(col, pattern), col, pa.scalar(None, pa.string()))
+        return pc.cast(col, arrow_type(pa, kind))
+    return col
+
+
+# stage "write": one block in input order, typed; written for the parent to stream out.
+# phones: (columns, separator) to rewrite with phones.normalize_phone_column, or None
+def _write_stage(folder, columns, url_column, types, path, phones=None):
+    pa, pc = _arrow()
+    t = _read_part(folder)
+    t = t.take(pc.sort_indices(t["_order"]))
+    if url_column:
+        t = t.set_column(t.column_names.index(url_column), url_column, t["_url"])
+    if phones:
+        from .phones import normalize_phone_column
+
+        for c in phones[0]:
+            t = t.set_column(t.column_names.index(c), c, pa.array(
+                normalize_phone_column(t[c].to_pandas(), phones[1]), pa.string(), from_pandas=True))
+    t = pa.table({c: _cast(pa, pc, t[c], types.get(c, str)) for c in columns})
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, t.schema) as writer:
+        writer.write_table(t)
+    return path
+
+
+# Before: yp8.xlsx of three weekly runs + yp8.partial.jsonl → After: one file, one row per
+# company (canonical URL; then normalized name + first phone), the newest input's row kept.
+# `output` is any sink format; Parquet keeps site.column_types (categories as dictionaries).
+# normalize_phones=True also writes site.phone_columns as "+994…" numbers, one per number
+# ("012 555 44 33; 050 111 22 33" → "+994125554433; +994501112233"). Returns the number of rows written.
+def consolidate(site, inputs, output, workers=None, buckets=None, batch_rows=100_000, block_rows=BLOCK_ROWS,
+                normalize_phones=False):
+    pa, _ = _arrow()
+    log = logging.getLogger(f"data_pipeline.{site.name}")
+    unsupported = [p for p in inputs if os.path.splitext(p)[1].lower() not in FORMATS]
+    if unsupported:
+        raise ValueError(f"Unsupported input(s) {', '.join(unsupported)} (expected {', '.join(FORMATS)})")
+    columns = site.columns + ["url"] * ("url" not in site.columns)
+    spec = (columns, "url", site.name_column, site.phone_columns)
+    workers = workers or os.cpu_count() or 1
+    size = sum(os.path.getsize(p) for p in inputs)
+    buckets = buckets or max(workers, -(-size // BUCKET_BYTES))
+    files = list(enumerate(inputs))
+    shares = [files[i::workers * 4] for i in range(min(len(files), workers * 4))]
+
+    with tempfile.TemporaryDirectory(dir=os.path.dirname(os.path.abspath(output))) as tmp, \
+            ProcessPoolExecutor(max_workers=workers) as pool:
+        counts = {}
+        for c in pool.map(_read_stage, shares, [spec] * len(shares), [tmp] * len(shares),
+                          [buckets] * len(shares), [batch_rows] * len(shares)):
+            counts.update(c)
+        log.info(f"Read {sum(counts.values())} rows from {len(inputs)} files into {buckets} buckets")
+
+        bounds = block_bounds(counts, block_rows)
+        stages = (("urls", "_ukey", "contacts", partial(_bucket, key="_ckey", buckets=buckets)),
+                  ("contacts", "_ckey", "blocks", partial(_block, bounds=bounds)))
+        for stage, key, next_stage, parts_of in stages:
+            parts = sorted(os.listdir(os.path.join(tmp, stage))) if os.path.isdir(os.path.join(tmp, stage)) else []
+            results = list(pool.map(_dedup_stage, [os.path.join(tmp, stage, p) for p in parts], [key] * len(parts),
+                                    [os.path.join(tmp, next_stage)] * len(parts), parts, [parts_of] * len(parts)))
+            before, after = sum(r[0] for r in results), sum(r[1] for r in results)
+            log.info(f"{stage}: {before - after} duplicates dropped, {after} rows left")
+
+        blocks_dir = os.path.join(tmp, "blocks")
+        blocks = sorted(os.listdir(blocks_dir), key=int) if os.path.isdir(blocks_dir) else []
+        written = pool.map(_write_stage, [os.path.join(blocks_dir, b) for b in blocks], [columns] * len(blocks),
+                           ["url"] * len(blocks), [site.column_types] * len(blocks),
+                           [os.path.join(tmp, f"out{b}.arrow") for b in blocks],
+                           [(site.phone_columns, site.phone_separator) if normalize_phones else None] * len(blocks))
+        count = _write_output(pa, written, output, columns, site.column_types)
+    log.info(f"Wrote {count} rows to {output}")
+    return count
+
+
+def _write_output(pa, blocks, output, columns, types):
+    count = 0
+    if output.lower().endswith(".parquet"):
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(c, arrow_type(pa, types.get(c, str))) for c in columns])
+        with pq.ParquetWriter(output, schema) as writer:
+            for path in blocks:
+                t = pa.ipc.open_file(pa.memory_map(path)).read_all()
+                writer.write_table(t)
+                count += len(t)
+        return count
+    with open_sink(output, columns) as sink:
+        for path in blocks:
+            for batch in pa.ipc.open_file(pa.memory_map(path)).read_all().to_batches():
+                for row in batch.to_pylist():
+                    sink.write(row)
+        return sink.count
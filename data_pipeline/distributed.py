@@ -0,0 +1,137 @@
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import sys
+import time
+from hashlib import blake2b
+
+from .checkpoint import CrawlState
+from .history import PageHistory
+from .pipeline import Crawl, make_engine, open_session, publish_rows, remove_state, run, sibling_path
+from .sites import SITES
+from .workqueue import Heartbeat, open_queue
+
+# Distributed crawl over a shared work queue (workqueue.py), one queue per site:
+#   coordinate  lists the site's groups, splits them into tasks (Site.shards) and seals the queue
+#   work        any number of worker processes, on any hosts sharing the queue and the parts
+#               directory, claim tasks and crawl each into its own partition with run()
+#   merge       once the queue is drained, folds the partitions together in task order and
+#               writes the output and delta as a local run would
+#
+# A partition (parts/<site>/<hash of task key>.*: state, HTTP cache, page history, partial
+# rows) belongs to its task, not its worker: a task reclaimed after a crash resumes where
+# the last worker stopped, and the same task next run finds its cache and page hashes.
+# Pages listed under groups of different tasks are fetched once per task; merge keeps one row.
+
+
+def partition(parts_dir, site_name, key):
+    return os.path.join(parts_dir, site_name, blake2b(key.encode("utf-8"), digest_size=8).hexdigest())
+
+
+def coordinate(site, settings, queue, parts_dir, fresh=False, cache_path="http_cache.db", cache_ttl=24 * 3600,
+               offline=False):
+    log = logging.getLogger(f"data_pipeline.{site.name}")
+    if fresh:
+        queue.clear()
+        folder = os.path.join(parts_dir, site.name)
+        if os.path.isdir(folder):
+            for f in os.listdir(folder):
+                if f.endswith(".db") and not f.endswith((".history.db", ".cache.db")):
+                    remove_state(os.path.join(folder, f))
+    if queue.sealed():
+        log.info(f"Queue already holds this run's tasks: {queue.counts()}")
+        return
+    with open_session(site, cache_path, cache_ttl, offline) as sess:
+        crawl = Crawl(site, make_engine(site, sess), None, log)
+        shards = site.shards(crawl, site.groups(crawl))
+    for shard in shards:
+        queue.put(json.dumps(shard, ensure_ascii=False, sort_keys=True),
+                  {"site": site.name, "settings": settings, "group": shard})
+    queue.seal()
+    log.info(f"Queued {len(shards)} tasks")
+
+
+# Claims tasks from the sites' queues until they are sealed and drained. `share` is how many
+# workers run on this host: the site's request rates are split between them, and so are the
+# CPUs for parsing unless the site sets parse_workers.
+def work(queue_url, names, parts_dir, lease=300, share=1, worker=None, poll=5.0, **run_kw):
+    worker = worker or f"{socket.gethostname()}:{os.getpid()}"
+    log = logging.getLogger("data_pipeline.worker")
+    queues = [open_queue(queue_url, n, lease) for n in names]
+    done = 0
+    while True:
+        queue, task = next(((q, t) for q in queues for t in [q.claim(worker)] if t), (None, None))
+        if task is None:
+            if all(q.sealed() and not ({"queued", "leased"} & q.counts().keys()) for q in queues):
+                log.info(f"[{worker}] Queues drained, {done} tasks done here")
+                return done
+            time.sleep(poll)
+            continue
+
+        name, group = task.payload["site"], task.payload["group"]
+        path = partition(parts_dir, name, task.key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        base = SITES[name](**task.payload["settings"])
+        site = SITES[name](**{
+            **task.payload["settings"],
+            "output_path": path + ".jsonl", "state_path": path + ".db", "history_path": path + ".history.db",
+            "requests_per_sec": base.requests_per_sec / share,
+            "min_requests_per_sec": base.min_requests_per_sec / share,
+            "max_requests_per_sec": base.max_requests_per_sec and base.max_requests_per_sec / share,
+            "parse_workers": base.parse_workers or max(1, (os.cpu_count() or 1) // share),
+        })
+        log.info(f"[{worker}] {name}: {group['group']} (attempt {task.attempts})")
+        with Heartbeat(queue, task, worker) as beat:
+            try:
+                complete = run(site, cache_path=path + ".cache.db", groups=[group], publish=False, **run_kw)
+            except Exception as e:
+                log.exception(f"[{worker}] {name}: {group['group']} failed")
+                queue.fail(task, worker, e)
+                continue
+        if beat.lost:
+            log.warning(f"[{worker}] {name}: lease on {group['group']} lost, leaving it to its new owner")
+            continue
+        queue.done(task, worker, {"complete": complete})
+        done += 1
+
+
+def merge(site, queue, parts_dir, snapshot=True):
+    log = logging.getLogger(f"data_pipeline.{site.name}")
+    counts = queue.counts()
+    if {"queued", "leased"} & counts.keys():
+        raise RuntimeError(f"{site.name}: queue not drained yet: {counts}")
+    done, failed = queue.finished(), queue.finished("failed")
+    for key, payload, error in failed:
+        log.warning(f"Task {payload['group']['group']} failed: {error}")
+    merged = os.path.join(parts_dir, site.name, "merged.db")
+    remove_state(merged)
+    with CrawlState(merged) as state, \
+            PageHistory(site.history_path or sibling_path(site.output_path, ".history.db")) as history:
+        for key, _, _ in done:
+            state.absorb(partition(parts_dir, site.name, key) + ".db")
+        log.info(f"Merged {len(done)} partitions")
+        complete = not failed and all(result["complete"] for _, _, result in done)
+        publish_rows(site, state, history, complete, snapshot)
+    return complete
+
+
+def _work_process(level, *args, **kwargs):
+    logging.basicConfig(level=level, format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+                        handlers=[logging.StreamHandler(sys.stdout)])
+    work(*args, **kwargs)
+
+
+# `workers` local worker processes (spawned, so none inherits the parent's threads); returns
+# how many exited with an error
+def run_workers(workers, queue_url, names, parts_dir, lease=300, **run_kw):
+    ctx = multiprocessing.get_context("spawn")
+    level = logging.getLogger().level
+    procs = [ctx.Process(target=_work_process, args=(level, queue_url, names, parts_dir, lease, workers),
+                         kwargs=run_kw, name=f"worker-{i}") for i in range(workers)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join()
+    return sum(1 for p in procs if p.exitcode)
@@ -0,0 +1,270 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from urllib.parse import urlsplit
+
+import requests
+from urllib3.exceptions import ProtocolError
+
+from . import metrics
+from .retry import HostHealth, RetryPolicy, THROTTLE_STATUSES
+from .transport import size_pool
+
+FETCH_REQUESTS = metrics.counter("fetch_requests_total", "HTTP requests sent, by host and status", ["host", "status"])
+FETCH_LATENCY = metrics.histogram("fetch_latency_seconds", "Time from sending a request to its response", ["host"])
+FETCH_WAIT = metrics.histogram("fetch_wait_seconds", "Time a request waited before being sent",
+                               ["host", "reason"])
+FETCH_BYTES = metrics.counter("fetch_bytes_total", "Response body bytes downloaded", ["host"])
+FETCH_RETRIES = metrics.counter("fetch_retries_total", "Requests retried, by host and cause", ["host", "reason"])
+FETCH_IN_FLIGHT = metrics.gauge("fetch_in_flight", "Requests currently on the wire")
+FETCH_RATE = metrics.gauge("fetch_rate_limit", "Current per-host request rate limit (req/s)", ["host"])
+FETCH_CUT = metrics.counter("fetch_cut_total", "Response bodies not read to the end: wanted content complete "
+                            "(until) or over max_body (too_large)", ["host", "reason"])
+
+# retried like a 5xx: failures to connect, and bodies broken off mid-read (read_body)
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError, ProtocolError)
+
+CHUNK_SIZE = 16 * 1024
+# what is left of a body cut short is still read (and thrown away) up to this size, so the
+# keep-alive connection can be reused; past it the connection is dropped instead
+DRAIN_LIMIT = 64 * 1024
+
+
+class BodyTooLarge(requests.RequestException):
+    pass
+
+
+def _finish_early(r):
+    length, tell = r.headers.get("Content-Length", ""), getattr(r.raw, "tell", None)
+    if tell is not None and length.isdigit() and int(length) - tell() <= DRAIN_LIMIT:
+        try:
+            for _ in r.iter_content(CHUNK_SIZE):
+                pass
+        except RETRY_ERRORS:  # the wanted content is in; only the connection is lost
+            r.close()
+    else:
+        r.close()
+
+
+# Before: r.content after a stream=True request (the whole body, however big) → After: the
+# body read chunk by chunk (already decompressed, never decoded to text) into r.content,
+# stopping once `watch` (parsing.until) has seen the end of the wanted content; r.truncated
+# tells. Reading past max_body bytes raises BodyTooLarge, and so does a Content-Length over it
+# when there is no `watch` that could stop the read before.
+def read_body(r, watch=None, max_body=None):
+    length = r.headers.get("Content-Length", "")
+    if max_body and watch is None and length.isdigit() and int(length) > max_body:
+        r.close()
+        raise BodyTooLarge(f"{r.url}: {length} bytes, over max_body {max_body}", response=r)
+    chunks, size, r.truncated = [], 0, False
+    try:
+        for chunk in r.iter_content(CHUNK_SIZE):
+            chunks.append(chunk)
+            size += len(chunk)
+            if max_body and size > max_body:
+                raise BodyTooLarge(f"{r.url}: over max_body {max_body} bytes", response=r)
+            if watch is not None and watch.feed(chunk):
+                r.truncated = True
+                _finish_early(r)
+                break
+    except Exception:
+        r.close()
+        raise
+    r._content = b"".join(chunks)
+    r._content_consumed = True
+    return r
+
+
+# Before: time.sleep(COMPANY_DELAY_SEC) after every request → After: at most `rate` req/sec, bursts up to `burst`
+class TokenBucket:
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.capacity = float(max(burst, 1))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.resume_at = 0.0
+        self.lock = threading.Lock()
+
+    def set_rate(self, rate):
+        with self.lock:
+            self.rate = float(rate)
+
+    # Retry-After: nobody gets a token for this host until the pause is over
+    def pause(self, seconds):
+        with self.lock:
+            self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+            self.tokens = 0.0
+            self.updated = self.resume_at
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                if now < self.resume_at:
+                    wait_sec = self.resume_at - now
+                else:
+                    self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                    self.updated = now
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    wait_sec = (1 - self.tokens) / self.rate
+            time.sleep(wait_sec)
+
+
+class _Host:
+    def __init__(self, name, concurrency, bucket, health):
+        self.name = name
+        self.sem = threading.BoundedSemaphore(concurrency)
+        self.bucket = bucket
+        self.health = health
+
+
+# Bounded thread-pool fetcher: a global cap on in-flight requests, a per-host cap and a
+# per-host token bucket. `get` has the same call shape as requests.Session.get, so code
+# written against a session (get_soup & co.) runs on the engine unchanged.
+#
+# rate_per_host is only the starting rate: each host's HostHealth moves it between
+# min_rate and max_rate from observed latency and 429/5xx responses. Retryable failures
+# are retried per `retry` (backoff + jitter, Retry-After honoured); once attempts run out
+# the last response is returned (raise_for_status then raises) or the error re-raised.
+#
+# Bodies are streamed in (read_body): max_body caps every response, and get(url, until=...)
+# stops reading a page where the wanted content ends. What was read is what the cache keeps,
+# marked with the `until` it was cut at (see httpcache.HttpCache).
+class FetchEngine:
+    def __init__(self, session=None, max_concurrency=16, per_host_concurrency=4,
+                 rate_per_host=2.0, burst=2, min_rate=0.2, max_rate=None, retry=None, max_body=None):
+        self.session = session or requests.Session()
+        self.max_concurrency = max_concurrency
+        self.per_host_concurrency = per_host_concurrency
+        self.rate_per_host = rate_per_host
+        self.burst = burst
+        self.min_rate = min_rate
+        self.max_rate = max_rate or rate_per_host * 4
+        self.retry = retry or RetryPolicy()
+        self.max_body = max_body
+        self.sent = 0  # requests sent to servers (not cache hits), retries included
+        self.calls = 0  # get() calls answered from the cache or past their first send
+
+        size_pool(self.session, max_concurrency)
+
+        self._global = threading.BoundedSemaphore(max_concurrency)
+        self._hosts = {}
+        self._lock = threading.Lock()
+
+    def _host_slot(self, url):
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            slot = self._hosts.get(host)
+            if slot is None:
+                bucket = TokenBucket(self.rate_per_host, self.burst)
+                health = HostHealth(bucket, min_rate=self.min_rate, max_rate=self.max_rate)
+                slot = self._hosts[host] = _Host(host, self.per_host_concurrency, bucket, health)
+        return slot
+
+    def host_stats(self):
+        with self._lock:
+            hosts = dict(self._hosts)
+        return {h: {"rate": s.bucket.rate, "latency": s.health.latency,
+                    "error_rate": s.health.error_rate, "requests": s.health.requests}
+                for h, s in hosts.items()}
+
+    # waits are split by reason: host_slot (per-host concurrency), rate_limit (token bucket,
+    # incl. Retry-After pauses), global_slot (max_concurrency) and backoff between retries
+    def get(self, url, until=None, **kwargs):
+        # cache hits (see httpcache.CachedSession) don't touch the server, so skip the limits
+        cache = getattr(self.session, "cache", None)
+        if cache is not None:
+            kwargs["until"] = until
+            if cache.fresh(url, until):
+                with self._lock:
+                    self.calls += 1
+                return self.session.get(url, **kwargs)
+        host = self._host_slot(url)
+        attempt = 0
+        while True:
+            attempt += 1
+            r, error = None, None
+            with self._lock:
+                self.sent += 1
+                self.calls += attempt == 1
+            waited = time.monotonic()
+            with host.sem:
+                now = time.monotonic()
+                FETCH_WAIT.observe(now - waited, host=host.name, reason="host_slot")
+                host.bucket.acquire()
+                waited, now = now, time.monotonic()
+                FETCH_WAIT.observe(now - waited, host=host.name, reason="rate_limit")
+                with self._global:
+                    started = time.monotonic()
+                    FETCH_WAIT.observe(started - now, host=host.name, reason="global_slot")
+                    FETCH_IN_FLIGHT.inc()
+                    try:
+                        r = self._send(url, until, host, cache, kwargs)
+                    except RETRY_ERRORS as e:
+                        error = e
+                    finally:
+                        FETCH_IN_FLIGHT.dec()
+                    latency = time.monotonic() - started
+
+            FETCH_LATENCY.observe(latency, host=host.name)
+            FETCH_REQUESTS.inc(host=host.name, status=r.status_code if r is not None else type(error).__name__)
+            if r is not None and not getattr(r, "from_cache", False):
+                FETCH_BYTES.inc(len(r.content), host=host.name)
+            retry_after = r.headers.get("Retry-After") if r is not None else None
+            ok = r is not None and r.status_code not in self.retry.statuses
+            throttled = r is None or r.status_code in THROTTLE_STATUSES
+            host.health.record(latency, ok, throttled=throttled and not ok, retry_after=retry_after)
+            FETCH_RATE.set(host.bucket.rate, host=host.name)
+            if ok:
+                return r
+            if attempt >= self.retry.max_attempts:
+                if r is not None:
+                    return r
+                raise error
+            FETCH_RETRIES.inc(host=host.name, reason=r.status_code if r is not None else type(error).__name__)
+            delay = self.retry.delay(attempt, retry_after)
+            FETCH_WAIT.observe(delay, host=host.name, reason="backoff")
+            time.sleep(delay)
+
+    def _send(self, url, until, host, cache, kwargs):
+        r = self.session.get(url, stream=True, **kwargs)
+        if getattr(r, "from_cache", False):
+            return r
+        try:
+            read_body(r, until.watch() if until is not None and r.status_code == 200 else None, self.max_body)
+        except BodyTooLarge:
+            FETCH_CUT.inc(host=host.name, reason="too_large")
+            raise
+        if r.truncated:
+            FETCH_CUT.inc(host=host.name, reason="until")
+        if cache is not None and r.status_code == 200:
+            cache.store(url, r, cut=until if r.truncated else None)
+        return r
+
+    # Before: for x in items: fn(x) → After: (item, result, error) tuples as they complete.
+    # Items are pulled lazily, so `items` may be a generator that is still being filled.
+    def map(self, fn, items, max_pending=None):
+        max_pending = max_pending or self.max_concurrency * 2
+        it = iter(items)
+        pending = {}
+        with ThreadPoolExecutor(max_workers=self.max_concurrency) as pool:
+            exhausted = False
+            while pending or not exhausted:
+                while not exhausted and len(pending) < max_pending:
+                    try:
+                        x = next(it)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending[pool.submit(fn, x)] = x
+                if not pending:
+                    break
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for fut in done:
+                    x = pending.pop(fut)
+                    try:
+                        yield x, fut.result(), None
+                    except Exception as e:
+                        yield x, None, e
@@ -0,0 +1,82 @@
+import math
+import threading
+from hashlib import blake2b
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "yclid", "mc_cid", "mc_eid"})
+DEFAULT_PORTS = {"http": "80", "https": "443"}
+
+
+# Before: "HTTPS://WWW.Example.com:443/company/1/x?utm_source=a&b=2&a=1#map"
+# → After: "https://www.example.com/company/1/x?a=1&b=2"
+def canonicalize_url(url):
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    if parts.port and str(parts.port) != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+        if not k.lower().startswith("utm_") and k.lower() not in TRACKING_PARAMS
+    )
+    return urlunsplit((scheme, host, parts.path or "/", urlencode(query), ""))
+
+
+# 64-bit signed key, so it fits an SQLite INTEGER PRIMARY KEY
+def url_hash(url):
+    return int.from_bytes(blake2b(url.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+# Fixed-size Bloom filter over url_hash values: ~1.2 MB per million entries at 1% false
+# positives. The k bit positions come from the two 32-bit halves of the hash.
+class BloomFilter:
+    def __init__(self, capacity=2_000_000, error_rate=0.01):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.k = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, h):
+        h &= 0xFFFFFFFFFFFFFFFF
+        h1, h2 = h & 0xFFFFFFFF, h >> 32 | 1
+        return ((h1 + i * h2) % self.size for i in range(self.k))
+
+    def add(self, h):
+        for p in self._positions(h):
+            self.bits[p >> 3] |= 1 << (p & 7)
+
+    def __contains__(self, h):
+        return all(self.bits[p >> 3] & (1 << (p & 7)) for p in self._positions(h))
+
+
+# Global "have we queued this company already" check across all categories. The Bloom
+# filter answers most lookups from memory; its (rare) positives are confirmed against the
+# store, which is authoritative and survives restarts. Without a store a plain set of
+# hashes is used instead.
+class UrlFrontier:
+    def __init__(self, store=None, capacity=2_000_000, error_rate=0.01):
+        self.store = store
+        self.bloom = BloomFilter(capacity, error_rate)
+        self.hashes = set() if store is None else None
+        self.lock = threading.Lock()
+        if store is not None:
+            for h in store.seen_hashes():
+                self.bloom.add(h)
+
+    def __contains__(self, url):
+        h = url_hash(url)
+        if h not in self.bloom:
+            return False
+        return h in self.hashes if self.store is None else self.store.seen_contains(h)
+
+    # Before: add("https://x.az/company/1") twice → After: True, then False
+    def add(self, url):
+        h = url_hash(url)
+        with self.lock:
+            if h in self.bloom and (h in self.hashes if self.store is None else self.store.seen_contains(h)):
+                return False
+            self.bloom.add(h)
+            if self.store is None:
+                self.hashes.add(h)
+            else:
+                self.store.seen_add(h)
+            return True
@@ -0,0 +1,166 @@
+import json
+import sqlite3
+import threading
+import time
+from hashlib import blake2b
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS pages (
+    url        TEXT PRIMARY KEY,
+    item       TEXT NOT NULL,
+    body_hash  TEXT NOT NULL,
+    data       TEXT NOT NULL,
+    first_seen REAL,
+    last_seen  REAL,
+    fetches    INTEGER NOT NULL DEFAULT 0,
+    changes    INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS records (
+    url  TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    data TEXT NOT NULL
+);
+"""
+
+# history files from before the fetch statistics
+PAGE_STATS = {"first_seen": "REAL", "last_seen": "REAL",
+              "fetches": "INTEGER NOT NULL DEFAULT 0", "changes": "INTEGER NOT NULL DEFAULT 0"}
+TOUCH_BATCH = 500
+
+
+# Before: b"<html>…" → After: "9f2c…" (32 hex chars)
+def content_hash(data):
+    return blake2b(data, digest_size=16).hexdigest()
+
+
+# Before: {"company name": "X", "fax": None} → After: same hash whatever the key order
+def record_hash(row):
+    return content_hash(json.dumps(row, ensure_ascii=False, sort_keys=True, default=str).encode("utf-8"))
+
+
+# What earlier runs saw, kept apart from the crawl state so it survives --fresh:
+#   pages    body hash of every page and the row parsed from it; a page whose body and item
+#            are unchanged is not parsed again (reuse), its stored row is used instead. Also
+#            when it was first and last fetched, how often, and how many of those fetches
+#            changed its row: the scheduler's freshness estimate (schedule.Scheduler)
+#   records  the rows of the last output, by URL and hash; diff() compares a new output
+#            against them to tell added / changed / removed records
+class PageHistory:
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        columns = {r[1] for r in self.conn.execute("PRAGMA table_info(pages)")}
+        for name, kind in PAGE_STATS.items():
+            if name not in columns:
+                self.conn.execute(f"ALTER TABLE pages ADD COLUMN {name} {kind}")
+        self.lock = threading.Lock()
+        self.hashes = {}  # url → body hash of pages fetched and not saved yet; None if reused
+        self.touched = []  # (time, url) of reused pages, written in batches
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        with self.lock:
+            self._flush_touched()
+            self.conn.commit()
+            self.conn.close()
+
+    def _flush_touched(self):
+        with self.conn:
+            self.conn.executemany("UPDATE pages SET first_seen = COALESCE(first_seen, ?1), last_seen = ?1, "
+                                  "fetches = fetches + 1 WHERE url = ?2", self.touched)
+        self.touched = []
+
+    # Called from the parse feeder with each fetched body: the row parsed from the same item
+    # and body on an earlier run, or None when the page has to be parsed.
+    def reuse(self, item, body):
+        url, h = item[2], content_hash(body)
+        with self.lock:
+            self.hashes[url] = h
+            row = self.conn.execute("SELECT item, body_hash, data FROM pages WHERE url = ?", (url,)).fetchone()
+        if row and row[1] == h and row[0] == json.dumps(list(item), ensure_ascii=False):
+            with self.lock:
+                self.hashes[url] = None
+                self.touched.append((time.time(), url))
+                if len(self.touched) >= TOUCH_BATCH:
+                    self._flush_touched()
+            return json.loads(row[2])
+        return None
+
+    # a new or changed body: its row replaces the stored one, counted as a change if it differs
+    def save(self, item, data):
+        url = item[2]
+        with self.lock, self.conn:
+            h = self.hashes.pop(url, None)
+            if h is not None:
+                now = time.time()
+                self.conn.execute(
+                    "INSERT INTO pages (url, item, body_hash, data, first_seen, last_seen, fetches) "
+                    "VALUES (?, ?, ?, ?, ?, ?, 1) ON CONFLICT (url) DO UPDATE SET "
+                    "item = excluded.item, body_hash = excluded.body_hash, data = excluded.data, "
+                    "first_seen = COALESCE(first_seen, excluded.first_seen), last_seen = excluded.last_seen, "
+                    "fetches = fetches + 1, changes = changes + (data != excluded.data)",
+                    (url, json.dumps(list(item), ensure_ascii=False), h, json.dumps(dict(data), ensure_ascii=False),
+                     now, now),
+                )
+
+    def forget(self, item):
+        with self.lock:
+            self.hashes.pop(item[2], None)
+
+    # Before: nothing known about a page → After: {url: (first_seen, last_seen, fetches, changes)}
+    # for every page fetched on an earlier run
+    def page_stats(self):
+        with self.lock:
+            return {r[0]: r[1:] for r in self.conn.execute(
+                "SELECT url, first_seen, last_seen, fetches, changes FROM pages")}
+
+    # Before: groups a budget-cut run never collected → After: {group_url: [url, ...]} of the
+    # pages earlier runs found under them
+    def group_pages(self, group_urls):
+        group_urls = set(group_urls)
+        out = {}
+        with self.lock:
+            rows = self.conn.execute("SELECT url, item FROM pages").fetchall()
+        for url, item in rows:
+            group_url = json.loads(item)[0]
+            if group_url in group_urls:
+                out.setdefault(group_url, []).append(url)
+        return out
+
+    # the row parsed from the page on the last run that fetched it, or None
+    def last_row(self, url):
+        with self.lock:
+            row = self.conn.execute("SELECT data FROM pages WHERE url = ?", (url,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    # Before: rows of this run vs. the last output → After: ("added" | "changed", row) for
+    # each new or different row, then ("removed", old row) for URLs no longer listed when
+    # `complete`. Once all are taken, the records table becomes this run's output; on an
+    # incomplete crawl the rows it didn't reach are kept, neither reported removed nor lost.
+    def diff(self, rows, complete=True):
+        with self.lock:
+            old = dict(self.conn.execute("SELECT url, hash FROM records"))
+        seen, upserts = set(), []
+        for row in rows:
+            url, h = row["url"], record_hash(row)
+            seen.add(url)
+            prev = old.get(url)
+            if prev != h:
+                upserts.append((url, h, json.dumps(row, ensure_ascii=False, default=str)))
+                yield ("added" if prev is None else "changed"), row
+        removed = sorted(old.keys() - seen) if complete else []
+        for url in removed:
+            with self.lock:
+                data = self.conn.execute("SELECT data FROM records WHERE url = ?", (url,)).fetchone()[0]
+            yield "removed", json.loads(data)
+        with self.lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO records (url, hash, data) VALUES (?, ?, ?)", upserts)
+            self.conn.executemany("DELETE FROM records WHERE url = ?", [(u,) for u in removed])
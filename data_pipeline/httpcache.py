@@ -0,0 +1,193 @@
+import json
+import sqlite3
+import threading
+import time
+import zlib
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from . import metrics
+
+CACHE_REQUESTS = metrics.counter(
+    "cache_requests_total", "GETs through CachedSession: hit, revalidated (304), miss, offline_miss", ["result"])
+CACHE_HIT_RATIO = metrics.gauge("cache_hit_ratio", "Share of GETs answered from the cache (hits + 304s)")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    url           TEXT PRIMARY KEY,
+    status        INTEGER NOT NULL,
+    headers       TEXT NOT NULL,
+    body          BLOB NOT NULL,
+    size          INTEGER NOT NULL,
+    etag          TEXT,
+    last_modified TEXT,
+    stored_at     REAL NOT NULL,
+    accessed_at   REAL NOT NULL,
+    cut           TEXT
+);
+CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed_at);
+"""
+
+
+class CacheMiss(requests.RequestException):
+    pass
+
+
+# On-disk response cache keyed by URL, bodies zlib-compressed. A body read only up to a
+# parsing.until rule is stored with that rule's key (cut) and only served to GETs with the
+# same `until`; a request for the whole page refetches it.
+#   ttl       entries younger than this are served without touching the network
+#   max_age   entries not used for this long are evicted
+#   max_bytes compressed bodies above this total are evicted least-recently-used first
+#   offline   serve everything from cache, never hit the network (CacheMiss otherwise)
+class HttpCache:
+    def __init__(self, path="http_cache.db", ttl=24 * 3600, max_age=90 * 24 * 3600,
+                 max_bytes=2 * 1024 ** 3, offline=False, prune_every=1000):
+        self.path = path
+        self.ttl = ttl
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        self.offline = offline
+        self.prune_every = prune_every
+        self._stores = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        # caches from before bodies were cut short
+        if "cut" not in {r[1] for r in self.conn.execute("PRAGMA table_info(responses)")}:
+            self.conn.execute("ALTER TABLE responses ADD COLUMN cut TEXT")
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+    def fresh(self, url, until=None):
+        if self.offline:
+            return True
+        with self.lock:
+            row = self.conn.execute("SELECT stored_at, cut FROM responses WHERE url = ?", (url,)).fetchone()
+        return bool(row) and _serves(row[1], until) and time.time() - row[0] < self.ttl
+
+    # None also when the stored body was cut at a different `until` than this request's
+    def lookup(self, url, until=None):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT status, headers, body, etag, last_modified, stored_at, cut FROM responses WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if not row or not _serves(row[6], until):
+            return None
+        status, headers, body, etag, last_modified, stored_at, _ = row
+        return {
+            "url": url, "status": status, "headers": json.loads(headers), "body": body,
+            "etag": etag, "last_modified": last_modified, "stored_at": stored_at,
+        }
+
+    # cut: the parsing.until the body was read up to (response.truncated), None for the whole body
+    def store(self, url, response, cut=None):
+        body = zlib.compress(response.content)
+        now = time.time()
+        with self.lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses (url, status, headers, body, size, etag, last_modified, "
+                "stored_at, accessed_at, cut) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (url, response.status_code, json.dumps(dict(response.headers)), body, len(body),
+                 response.headers.get("ETag"), response.headers.get("Last-Modified"), now, now,
+                 cut.key if cut is not None else None),
+            )
+            self._stores += 1
+        if self._stores % self.prune_every == 0:
+            self.prune()
+
+    # 304 Not Modified: the stored body is current again
+    def touch(self, url, stored=True):
+        now = time.time()
+        column = "stored_at = ?, accessed_at = ?" if stored else "accessed_at = ?"
+        params = (now, now, url) if stored else (now, url)
+        with self.lock, self.conn:
+            self.conn.execute(f"UPDATE responses SET {column} WHERE url = ?", params)
+
+    def prune(self):
+        with self.lock, self.conn:
+            self.conn.execute("DELETE FROM responses WHERE accessed_at < ?", (time.time() - self.max_age,))
+            total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+            if total <= self.max_bytes:
+                return
+            cur = self.conn.execute("SELECT url, size FROM responses ORDER BY accessed_at")
+            victims = []
+            for url, size in cur:
+                if total <= self.max_bytes:
+                    break
+                victims.append((url,))
+                total -= size
+            self.conn.executemany("DELETE FROM responses WHERE url = ?", victims)
+
+    def to_response(self, entry):
+        r = requests.Response()
+        r.url = entry["url"]
+        r.status_code = entry["status"]
+        r.headers = CaseInsensitiveDict(entry["headers"])
+        r.encoding = get_encoding_from_headers(r.headers)
+        r._content = zlib.decompress(entry["body"])
+        r._content_consumed = True
+        r.from_cache = True
+        return r
+
+
+def _serves(cut, until):
+    return cut is None or (until is not None and cut == until.key)
+
+
+def _count(result):
+    CACHE_REQUESTS.inc(result=result)
+    hits = CACHE_REQUESTS.value(result="hit") + CACHE_REQUESTS.value(result="revalidated")
+    CACHE_HIT_RATIO.set(hits / max(CACHE_REQUESTS.total(), 1))
+
+
+# Drop-in requests.Session: GETs are answered from the cache while fresh and revalidated
+# with If-None-Match / If-Modified-Since once stale. A stream=True miss comes back unread and
+# isn't stored: whoever reads the body stores what it read (FetchEngine does). `until` is the
+# parsing.until the caller will cut the body at, so bodies cut the same way can be served.
+class CachedSession(requests.Session):
+    def __init__(self, cache):
+        super().__init__()
+        self.cache = cache
+
+    def request(self, method, url, *args, until=None, **kwargs):
+        if method.upper() != "GET":
+            return super().request(method, url, *args, **kwargs)
+
+        entry = self.cache.lookup(url, until)
+        if entry and (self.cache.offline or time.time() - entry["stored_at"] < self.cache.ttl):
+            self.cache.touch(url, stored=False)
+            _count("hit")
+            return self.cache.to_response(entry)
+        if self.cache.offline:
+            _count("offline_miss")
+            raise CacheMiss(f"{url} is not cached (offline mode)")
+
+        headers = dict(kwargs.pop("headers", None) or {})
+        if entry and entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry and entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+
+        r = super().request(method, url, *args, headers=headers, **kwargs)
+        if r.status_code == 304 and entry:
+            r.close()
+            self.cache.touch(url)
+            _count("revalidated")
+            return self.cache.to_response(entry)
+        _count("miss")
+        if r.status_code == 200 and not kwargs.get("stream"):
+            self.cache.store(url, r)
+        return r
+
+    def close(self):
+        super().close()
+        self.cache.close()
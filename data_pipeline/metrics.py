@@ -0,0 +1,285 @@
+import cProfile
+import json
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def samples(self):
+        with self.lock:
+            return [(dict(zip(self.labelnames, k)), v) for k, v in self.values.items()]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self.lock:
+            self.values[key] = self.values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self.lock:
+            return self.values.get(self._key(labels), 0)
+
+    def total(self):
+        with self.lock:
+            return sum(self.values.values())
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self.lock:
+            self.values[self._key(labels)] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class _HistogramValue:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, n):
+        self.counts = [0] * n
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self.lock:
+            h = self.values.get(key)
+            if h is None:
+                h = self.values[key] = _HistogramValue(len(self.buckets))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    h.counts[i] += 1
+                    break
+            h.sum += value
+            h.count += 1
+
+    # Before: with FETCH_LATENCY.time(host="x"): ... → After: one observation of the block's duration
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self):
+        with self.lock:
+            out = []
+            for k, h in self.values.items():
+                cumulative, running = {}, 0
+                for bound, c in zip(self.buckets, h.counts):
+                    running += c
+                    cumulative[repr(bound)] = running
+                cumulative["+Inf"] = h.count
+                out.append((dict(zip(self.labelnames, k)),
+                            {"count": h.count, "sum": h.sum, "buckets": cumulative}))
+            return out
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels, extra=None):
+    pairs = list(labels.items()) + list((extra or {}).items())
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}" if pairs else ""
+
+
+# All metrics of a process, by name. Modules declare theirs at import time
+# (metrics.counter(...) etc. on the default REGISTRY); asking twice for a name returns the
+# same metric.
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+
+    def _get(self, cls, name, help_text, labelnames, **kw):
+        with self.lock:
+            m = self.metrics.get(name)
+            if m is None:
+                m = self.metrics[name] = cls(name, help_text, labelnames, **kw)
+            elif type(m) is not cls:
+                raise ValueError(f"metric {name} is already registered as a {m.kind}")
+            return m
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._get(Counter, name, help_text, labelnames)
+
+    def gauge(self, name, help_text, labelnames=()):
+        return self._get(Gauge, name, help_text, labelnames)
+
+    def histogram(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help_text, labelnames, buckets=buckets)
+
+    # Prometheus text exposition format, version 0.0.4
+    def render_prometheus(self):
+        lines = []
+        with self.lock:
+            metrics = list(self.metrics.values())
+        for m in metrics:
+            lines.append(f"# HELP {m.name} {m.help}")
+            lines.append(f"# TYPE {m.name} {m.kind}")
+            for labels, v in m.samples():
+                if m.kind == "histogram":
+                    for le, c in v["buckets"].items():
+                        lines.append(f"{m.name}_bucket{_labels(labels, {'le': le})} {c}")
+                    lines.append(f"{m.name}_sum{_labels(labels)} {v['sum']}")
+                    lines.append(f"{m.name}_count{_labels(labels)} {v['count']}")
+                else:
+                    lines.append(f"{m.name}{_labels(labels)} {v}")
+        return "\n".join(lines) + "\n"
+
+    # Before: two counters → After: {"at": …, "metrics": {"fetch_requests_total": {"type": "counter",
+    # "values": [{"labels": {"host": "x", "status": "200"}, "value": 12}, …]}, …}}
+    def snapshot(self):
+        with self.lock:
+            metrics = list(self.metrics.values())
+        return {
+            "at": time.time(),
+            "metrics": {m.name: {"type": m.kind, "values": [{"labels": l, "value": v} for l, v in m.samples()]}
+                        for m in metrics},
+        }
+
+
+REGISTRY = Registry()
+counter = REGISTRY.counter
+gauge = REGISTRY.gauge
+histogram = REGISTRY.histogram
+
+
+# GET /metrics (Prometheus text) and /metrics.json (snapshot) from a daemon thread.
+# Before: serve(9108) → After: curl localhost:9108/metrics
+def serve(port=9108, registry=REGISTRY, host="127.0.0.1"):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            path = self.path.split("?")[0]
+            if path == "/metrics":
+                body, ctype = registry.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8"
+            elif path == "/metrics.json":
+                body, ctype = json.dumps(registry.snapshot(), ensure_ascii=False), "application/json"
+            else:
+                self.send_response(404)
+                self.end_headers()
+                return
+            data = body.encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+# Appends a snapshot to a JSON-lines file every `interval` seconds (and once more on close).
+# Each line also carries "rates": per-second increase of every counter since the previous
+# line, e.g. crawl_rows_total → rows/sec, per category.
+class SnapshotWriter:
+    def __init__(self, path, interval=30.0, registry=REGISTRY):
+        self.path = path
+        self.interval = interval
+        self.registry = registry
+        self._last = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.write()
+
+    def write(self):
+        snap = self.registry.snapshot()
+        counters = {(name, json.dumps(v["labels"], sort_keys=True)): (v["labels"], v["value"])
+                    for name, m in snap["metrics"].items() if m["type"] == "counter" for v in m["values"]}
+        rates = {}
+        if self._last is not None:
+            elapsed = max(snap["at"] - self._last[0], 1e-9)
+            for (name, key), (labels, value) in counters.items():
+                before = self._last[1].get((name, key), (labels, 0))[1]
+                rates.setdefault(name, []).append({"labels": labels, "per_sec": (value - before) / elapsed})
+        self._last = (snap["at"], counters)
+        snap["rates"] = rates
+        with open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(snap, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self._stop.set()
+        self._thread.join()
+        self.write()
+
+
+# Profiles a random `sample_rate` share of calls. Dumps go to out_dir: .prof for cProfile
+# (snakeviz / pstats), .html for pyinstrument when tool="pyinstrument" and it is installed.
+# Picklable, so it can be handed to the ParsePool worker processes.
+class PageProfiler:
+    def __init__(self, sample_rate=0.01, out_dir="profiles", tool="cprofile"):
+        self.sample_rate = sample_rate
+        self.out_dir = out_dir
+        self.tool = tool
+
+    # Before: fn(*args) → After: same result; every ~1/sample_rate-th call leaves a profile behind
+    def __call__(self, fn, *args, name="page"):
+        if random.random() >= self.sample_rate:
+            return fn(*args)
+        os.makedirs(self.out_dir, exist_ok=True)
+        stem = os.path.join(self.out_dir, f"{name}-{os.getpid()}-{time.time_ns()}")
+        if self.tool == "pyinstrument":
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                Profiler = None
+            if Profiler is not None:
+                with Profiler() as prof:
+                    result = fn(*args)
+                with open(stem + ".html", "w", encoding="utf-8") as fh:
+                    fh.write(prof.output_html())
+                return result
+        prof = cProfile.Profile()
+        result = prof.runcall(fn, *args)
+        prof.dump_stats(stem + ".prof")
+        return result
@@ -0,0 +1,103 @@
+import os
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from . import metrics
+
+PARSE_SECONDS = metrics.histogram("parse_seconds", "Worker time spent parsing one page", ["stage", "category"])
+PARSE_REUSED = metrics.counter("parse_reused_total", "Pages not parsed again: same body as last run", ["stage"])
+PARSE_ERRORS = metrics.counter("parse_errors_total", "Pages whose parse raised", ["stage"])
+PARSE_QUEUE = metrics.gauge("parse_queue_depth", "Bodies submitted to the parsers and not parsed yet", ["stage"])
+PARSE_WAITING = metrics.gauge("parse_results_waiting", "Parsed results not yet taken by the consumer", ["stage"])
+
+_DONE = object()
+
+
+# runs in the worker: the parse itself, timed there so queueing in the pool isn't counted
+def _timed_parse(parse, profiler, item, body):
+    started = time.perf_counter()
+    result = profiler(parse, item, body, name=parse.__name__) if profiler else parse(item, body)
+    return result, time.perf_counter() - started
+
+
+# Parsing stage decoupled from fetching: fetched (item, body, error) tuples are handed to a
+# process pool running `parse(item, body)`. At most `queue_size` bodies wait for or sit in
+# the parsers; beyond that the feeder stops pulling from `fetched`, which in turn stops the
+# fetch threads (FetchEngine.map pulls its input lazily) instead of buffering HTML.
+#
+# `parse` must be a module-level function so it can be sent to the worker processes.
+# Parse times are recorded under `stage` (default: the parse function's name), broken down
+# by category when `category(item)` is given; `profiler` (metrics.PageProfiler) profiles a
+# sample of the pages inside the workers.
+class ParsePool:
+    def __init__(self, parse, workers=None, queue_size=64, stage=None, category=None, profiler=None):
+        self.parse = parse
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.stage = stage or parse.__name__
+        self.category = category
+        self.profiler = profiler
+        self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.executor.shutdown(wait=True, cancel_futures=True)
+
+    # Before: for item, body, err in fetched: parse(item, body) → After: same tuples, parsed
+    # on all cores, yielded in completion order. `reuse(item, body)` may return a row parsed
+    # earlier from the same input (history.PageHistory.reuse); that row is yielded as is.
+    def parse_all(self, fetched, reuse=None):
+        slots = threading.BoundedSemaphore(self.queue_size)
+        results = queue.Queue()
+
+        # the slot is given back only after the result is queued, so the feeder's _DONE
+        # (put once it holds every slot) can't overtake the last results
+        def on_parsed(fut, item):
+            PARSE_QUEUE.dec(stage=self.stage)
+            try:
+                result, seconds = fut.result()
+            except Exception as e:
+                PARSE_ERRORS.inc(stage=self.stage)
+                results.put((item, None, e))
+            else:
+                category = self.category(item) if self.category else ""
+                PARSE_SECONDS.observe(seconds, stage=self.stage, category=category)
+                results.put((item, result, None))
+            PARSE_WAITING.set(results.qsize(), stage=self.stage)
+            slots.release()
+
+        def feed():
+            try:
+                for item, body, err in fetched:
+                    if err is not None:
+                        results.put((item, None, err))
+                        continue
+                    row = reuse(item, body) if reuse else None
+                    if row is not None:
+                        PARSE_REUSED.inc(stage=self.stage)
+                        results.put((item, row, None))
+                        continue
+                    slots.acquire()
+                    PARSE_QUEUE.inc(stage=self.stage)
+                    fut = self.executor.submit(_timed_parse, self.parse, self.profiler, item, body)
+                    fut.add_done_callback(lambda f, item=item: on_parsed(f, item))
+            except Exception as e:
+                results.put((None, None, e))
+            finally:
+                for _ in range(self.queue_size):
+                    slots.acquire()
+                results.put(_DONE)
+
+        threading.Thread(target=feed, daemon=True).start()
+        while True:
+            res = results.get()
+            if res is _DONE:
+                return
+            yield res
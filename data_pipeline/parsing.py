@@ -0,0 +1,100 @@
+import json
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    from bs4.filter import ElementFilter
+except ImportError:  # beautifulsoup4 < 4.13
+    ElementFilter = None
+
+try:
+    from lxml import etree
+    HTML_PARSER = "lxml"
+except ImportError:
+    etree = None
+    HTML_PARSER = "html.parser"
+
+
+def _wanted(names, classes, ids, name, attrs):
+    if name in names:
+        return True
+    attrs = attrs or {}
+    if ids and attrs.get("id") in ids:
+        return True
+    if classes:
+        cls = attrs.get("class") or ()
+        if isinstance(cls, str):
+            cls = cls.split()
+        return not classes.isdisjoint(cls)
+    return False
+
+
+if ElementFilter is not None:
+    class _Only(ElementFilter):
+        def __init__(self, names, classes, ids):
+            super().__init__()
+            self.rule = (frozenset(names), frozenset(classes), frozenset(ids))
+
+        @property
+        def includes_everything(self):
+            return False
+
+        def allow_tag_creation(self, nsprefix, name, attrs):
+            return _wanted(*self.rule, name, attrs)
+
+        def allow_string_creation(self, string):
+            return False
+
+
+# Before: only(classes=["info"], ids=["company_name"]) → After: a parse_only filter that keeps
+# just those elements (and everything inside them); the rest of the page is never built.
+def only(names=(), classes=(), ids=()):
+    if ElementFilter is not None:
+        return _Only(names, classes, ids)
+    rule = (frozenset(names), frozenset(classes), frozenset(ids))
+    return SoupStrainer(lambda name, attrs=None: _wanted(*rule, name, attrs))
+
+
+class _Until:
+    def __init__(self, names, classes, ids, after):
+        self.rule = (frozenset(names), frozenset(classes), frozenset(ids))
+        self.after = frozenset(after)
+        # what the HTTP cache marks a body cut here with: only the same rule is served it
+        self.key = json.dumps([sorted(names), sorted(classes), sorted(ids), sorted(after)])
+
+    # one per response; None without lxml (the page is read to the end)
+    def watch(self):
+        return _Watch(self.rule, self.after) if etree is not None else None
+
+
+# Incremental parser over a body as it streams in: feed(chunk) is True once the stop element
+# has started. Only start tags are looked at; the tree it builds is dropped with it.
+class _Watch:
+    def __init__(self, rule, after):
+        self.rule = rule
+        self.pending = set(after)
+        self.parser = etree.HTMLPullParser(events=("start",))
+
+    def feed(self, chunk):
+        self.parser.feed(chunk)
+        for _, el in self.parser.read_events():
+            if self.pending:
+                self.pending.discard(el.get("id"))
+            elif _wanted(*self.rule, el.tag, el.attrib):
+                return True
+        return False
+
+
+# Before: until(classes=["footer"], after=["company_name"]) → After: the page is read up to its
+# first <... class="footer"> following #company_name, the rest is never downloaded
+# (FetchEngine.get(url, until=...)). The `after` ids guard against a stray match above the
+# content; a page where they never show up is read to the end.
+def until(names=(), classes=(), ids=(), after=()):
+    return _Until(names, classes, ids, after)
+
+
+# Bytes go straight to the parser (no r.text decode round-trip). lxml is used when it is
+# installed, html.parser otherwise; pass parser="html.parser" to force the old behaviour.
+def make_soup(markup, parse_only=None, parser=None, encoding="utf-8"):
+    kwargs = {"from_encoding": encoding} if isinstance(markup, bytes) else {}
+    return BeautifulSoup(markup, parser or HTML_PARSER, parse_only=parse_only, **kwargs)
@@ -0,0 +1,79 @@
+import re
+
+_NON_DIGIT = re.compile(r"\D")
+_PLUS_SPACE = re.compile(r"\+\s+(\d)")
+
+
+# Before: "(012) 555 44 33" / "00994 12 5554433" / "994125554433" → After: "+994125554433"
+# Before: "555-44" (7 digits or fewer, no area code) → After: "555-44"
+def normalize_az_phone(raw: str) -> str | None:
+    if not raw:
+        return None
+    digits = _NON_DIGIT.sub("", raw)
+
+    if len(digits) <= 7:
+        return raw.strip()
+
+    if digits.startswith("00994"):
+        return "+994" + digits[5:]
+    if digits.startswith("994"):
+        return "+" + digits
+    if digits.startswith("0"):
+        digits = digits[1:]
+
+    return "+994" + digits
+
+
+# Before: "+ 994 50 765 43 21" → After: "+994 50 765 43 21"
+def squash_plus_space(raw: str) -> str:
+    return _PLUS_SPACE.sub(r"+\1", (raw or "").strip())
+
+
+# Ordered set of phone strings for one field. Values keep their original spelling, but two
+# spellings of the same number ("012 555 44 33" / "+994 12 555 44 33") count once.
+class PhoneSet:
+    __slots__ = ("items", "keys")
+
+    def __init__(self, values=()):
+        self.items = []
+        self.keys = set()
+        for v in values:
+            self.add(v)
+
+    def add(self, raw):
+        v = squash_plus_space(raw)
+        if not v:
+            return
+        key = normalize_az_phone(v)
+        if key not in self.keys:
+            self.keys.add(key)
+            self.items.append(v)
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def __str__(self):
+        return "; ".join(self.items)
+
+
+# Vectorized normalize_az_phone for a whole column: same rules, no Python-level loop.
+# Missing/empty cells come back as <NA>.
+def normalize_az_phone_series(s):
+    import pandas as pd
+
+    raw = s.astype("string")
+    digits = raw.str.replace(r"\D", "", regex=True)
+    national = digits.str.replace(r"^(?:00994|994|0)", "", regex=True)
+    out = ("+994" + national).where(digits.str.len() > 7, raw.str.strip())
+    return out.mask(raw.isna() | (raw == ""), pd.NA)
+
+
+# Before: "012 555 44 33, +994 12 555 44 33, 050 111 22 33" → After: "+994125554433, +994501112233"
+# Multi-number cells are split on `sep`, normalized and de-duplicated per cell, then re-joined.
+def normalize_phone_column(s, sep=", "):
+    import pandas as pd
+
+    parts = s.astype("string").str.split(re.escape(sep.strip()) + r"\s*", regex=True).explode()
+    parts = normalize_az_phone_series(parts.str.strip()).dropna()
+    parts = parts[~pd.MultiIndex.from_arrays([parts.index, parts]).duplicated()]
+    return parts.groupby(level=0, sort=False).agg(sep.join).reindex(s.index).astype("string")
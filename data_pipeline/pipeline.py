@@ -0,0 +1,263 @@
+import logging
+import os
+from contextlib import nullcontext
+
+from . import metrics
+from .checkpoint import CrawlState
+from .fetcher import FetchEngine
+from .history import PageHistory
+from .httpcache import CachedSession, HttpCache
+from .parse_pool import ParsePool
+from .records import Columns
+from .retry import DeadLetterQueue, RetryPolicy
+from .schedule import Budget, Scheduler
+from .sinks import JsonlSink, open_sink
+from .transport import make_session
+
+QUEUED = metrics.counter("crawl_items_queued_total", "Pages queued for parsing, by site and group", ["site", "group"])
+ROWS = metrics.counter("crawl_rows_total", "Pages parsed and saved, by site and group", ["site", "group", "run"])
+FAILED = metrics.counter("crawl_failed_total", "Pages whose fetch or parse failed", ["site", "group", "run"])
+CHANGES = metrics.counter("crawl_changes_total", "Output records added, changed or removed since the last run",
+                          ["site", "change"])
+
+
+# What a site adapter works with while collecting: the rate-limited engine (get / map),
+# the crawl state and the site's logger; `history` is what earlier runs fetched and wrote.
+class Crawl:
+    def __init__(self, site, engine, state, log, history=None):
+        self.site = site
+        self.engine = engine
+        self.state = state
+        self.log = log
+        self.history = history
+
+
+# Before: yp8.xlsx → After: yp8.partial.jsonl / yp8.failed.jsonl / yp8.metrics.jsonl / yp8.delta.xlsx
+def sibling_path(output_path, suffix):
+    return os.path.splitext(output_path)[0] + suffix
+
+
+def crawl_items(crawl, parsers, sink, items, tag, on_result=None, dead_letters=None):
+    site, state, history, log = crawl.site, crawl.state, crawl.history, crawl.log
+    parsed = failed = 0
+    fetched = crawl.engine.map(lambda item: site.fetch(crawl, item[2], until=site.page_until), items)
+    for item, data, err in parsers.parse_all(fetched, reuse=history.reuse if history else None):
+        if item is None:
+            raise err
+        group_url, group, url = item[:3]
+        if err:
+            failed += 1
+            FAILED.inc(site=site.name, group=group, run=tag)
+            state.mark_failed(group_url, url, err, item)
+            if history:
+                history.forget(item)
+            log.warning(f"[{tag}] Failed {url} ({err})")
+            if dead_letters is not None:
+                dead_letters.add(list(item), err)
+        else:
+            parsed += 1
+            ROWS.inc(site=site.name, group=group, run=tag)
+            state.save_row(group_url, url, data)
+            if history:
+                history.save(item, data)
+            sink.write(data)
+        if (parsed + failed) % 100 == 0:
+            log.info(f"[{tag}] {parsed} pages parsed, {failed} failed")
+        if on_result:
+            on_result(group_url, err is None)
+    return failed
+
+
+# Before: the site's state store → After: its output rows in column buffers, for
+# .to_pandas() / .to_arrow() without a list of row dicts in between
+def load_rows(site, columns=None):
+    rows = Columns(columns or site.columns, site.column_types)
+    with CrawlState(site.state_path) as state:
+        for row in state.iter_rows(site.group_column):
+            rows.append(site.clean_row(row))
+    return rows
+
+
+def remove_state(path):
+    for p in (path, path + "-wal", path + "-shm"):
+        if os.path.exists(p):
+            os.remove(p)
+
+
+def open_session(site, cache_path="http_cache.db", cache_ttl=24 * 3600, offline=False):
+    cache = HttpCache(cache_path, ttl=cache_ttl, offline=offline)
+    return make_session(site.headers, pool_size=site.max_concurrency, verify=site.verify, http2=site.http2,
+                        session=CachedSession(cache))
+
+
+def make_engine(site, session):
+    return FetchEngine(session, max_concurrency=site.max_concurrency,
+                       per_host_concurrency=site.per_host_concurrency,
+                       rate_per_host=site.requests_per_sec, burst=site.burst,
+                       min_rate=site.min_requests_per_sec, max_rate=site.max_requests_per_sec,
+                       retry=RetryPolicy(max_attempts=site.max_attempts), max_body=site.max_body_bytes)
+
+
+# Groups are collected `discovery_parallelism` at a time on the engine; each one's pages are
+# handed to the parsers as soon as it is collected, while later groups are still being
+# discovered. A group is marked done once all its pages parsed cleanly; a page listed under
+# several groups is fetched once (see CrawlState).
+#
+# Output: rows stream to <output>.partial.jsonl as they are parsed (a resumed run appends to
+# the rows already there; --fresh starts it over); the output file is written from the state
+# store at the end, one row per page. Pages still failing after the retry pass are listed in
+# <output>.failed.jsonl and retried in the next run's retry pass, also after --fresh.
+#
+# Recurring runs (--fresh each week): page bodies and output rows are hashed into the site's
+# history file. A page whose body is unchanged since the last run isn't parsed again, and
+# <output>.delta.<ext> lists the rows added, changed or removed since the last output, with
+# a "change" column; snapshot=False writes only the delta. Removals are only reported once
+# every group was crawled without failures.
+#
+# Short, frequent runs: prioritize=True collects every group first, then fetches the pages
+# most likely to have changed first (schedule.Scheduler, weighted by site.category_weights).
+# A budget (budget_seconds / budget_requests, implies prioritize) stops handing out pages once
+# spent; budget_requests counts page requests only, discovery runs in full. Pages not reached
+# stay in the output with their last known row, and a next run without --fresh picks them up.
+#
+# `groups` crawls those instead of the site's own list and publish=False stops at the state
+# store (a distributed worker's partition; see distributed.py). Returns whether every group
+# was crawled without failures.
+def run(site, cache_path="http_cache.db", cache_ttl=24 * 3600, offline=False, fresh=False,
+        metrics_path=None, metrics_every=30, profile_sample=0.0, profile_dir="profiles", profile_tool="cprofile",
+        snapshot=True, groups=None, publish=True, prioritize=False, budget_seconds=None, budget_requests=None):
+    log = logging.getLogger(f"data_pipeline.{site.name}")
+    if fresh:
+        remove_state(site.state_path)
+    resume = os.path.exists(site.state_path)
+    partial_path = sibling_path(site.output_path, ".partial.jsonl")
+    dead_letters = DeadLetterQueue(sibling_path(site.output_path, ".failed.jsonl"))
+    profiler = metrics.PageProfiler(profile_sample, profile_dir, profile_tool) if profile_sample else None
+
+    with metrics.SnapshotWriter(metrics_path or sibling_path(site.output_path, ".metrics.jsonl"), metrics_every), \
+            open_session(site, cache_path, cache_ttl, offline) as sess, CrawlState(site.state_path) as state, \
+            PageHistory(site.history_path or sibling_path(site.output_path, ".history.db")) as history, \
+            JsonlSink(partial_path, row_columns(site), append=resume) as sink, \
+            ParsePool(site.parse, site.parse_workers, site.parse_queue_size, stage=site.name,
+                      category=lambda item: item[1], profiler=profiler) as parsers:
+        engine = make_engine(site, sess)
+        crawl = Crawl(site, engine, state, log, history)
+        budget = None
+        if budget_seconds is not None or budget_requests is not None:
+            budget = Budget(engine, budget_seconds, budget_requests)
+        scheduler = Scheduler(history.page_stats(), site.category_weights) if prioritize or budget else None
+
+        if groups is not None:
+            state.save_categories(groups)
+        else:
+            groups = state.load_categories()
+            if groups:
+                log.info(f"Resuming crawl from {site.state_path}")
+            else:
+                groups = site.groups(crawl)
+                state.save_categories(groups)
+        log.info(f"Discovered {len(groups)} groups")
+
+        todo = [g for g in groups if not state.category_done(g["url"])]
+        log.info(f"{len(groups) - len(todo)} groups already done, {len(todo)} to crawl")
+        if scheduler:
+            todo.sort(key=lambda g: -site.category_weights.get(g["group"], 1.0))
+        remaining, broken = {}, set()
+
+        def finish(group_url, ok):
+            if not ok:
+                broken.add(group_url)
+            remaining[group_url] -= 1
+            if remaining[group_url] == 0 and group_url not in broken:
+                state.mark_category_done(group_url)
+
+        def discovered():
+            collected = engine.map(lambda g: site.collect(crawl, g), budget.in_time(todo) if budget else todo,
+                                   max_pending=site.discovery_parallelism)
+            for gi, (group, pending, err) in enumerate(collected, 1):
+                if err:
+                    log.warning(f"[GROUP {gi}/{len(todo)}] Discovery failed for {group['group']} ({err})")
+                    continue
+                log.info(f"[GROUP {gi}/{len(todo)}] {group['group']}: queued {len(pending)} pages")
+                QUEUED.inc(len(pending), site=site.name, group=group["group"])
+                remaining[group["url"]] = len(pending)
+                if not pending:
+                    state.mark_category_done(group["url"])
+                yield pending
+
+        def items():
+            if scheduler is None:
+                for pending in discovered():
+                    yield from pending
+                return
+            for pending in discovered():
+                scheduler.extend(pending)
+            log.info(f"Fetching {len(scheduler)} pages by priority")
+            yield from scheduler
+
+        crawl_items(crawl, parsers, sink, budget.limit(items()) if budget else items(), "CRAWL", on_result=finish)
+
+        cut = budget is not None and budget.cut
+        if cut:
+            log.info(f"Budget spent ({budget}): {carry_over(crawl, todo, remaining)} pages keep their last "
+                     f"known row, failed pages wait for the next run")
+
+        # one more pass over pages that failed after all retries, this run or the last one,
+        # once the host has had time to recover; whatever still fails stays queued for the next
+        # run. A budget-cut run leaves both for the next run.
+        if not cut:
+            state.requeue_failed(dead_letters.drain())
+        by_url = {g["url"]: g for g in state.load_categories()}
+        for group_url, failed in ({} if cut else state.failed_companies()).items():
+            group = by_url[group_url]
+            log.info(f"[RETRY] {len(failed)} failed pages in {group['group']}")
+            retry = [item or site.item(group, u) for u, item in failed]
+            if not crawl_items(crawl, parsers, sink, retry, "RETRY", dead_letters=dead_letters):
+                state.mark_category_done(group_url)
+        log.info(f"Host stats: {engine.host_stats()}")
+        log.info(f"Parsed {sink.count} pages this run")
+
+        complete = all(state.category_done(g["url"]) for g in groups) and not state.failed_companies()
+        if publish:
+            publish_rows(site, state, history, complete, snapshot)
+    return complete
+
+
+# Pages a budget-cut run didn't reach, including those of groups it didn't get to collect,
+# go in the output with the row of the last run that fetched them. Returns how many.
+def carry_over(crawl, todo, collected):
+    state, history = crawl.state, crawl.history
+    for group_url, urls in history.group_pages(g["url"] for g in todo if g["url"] not in collected).items():
+        state.add_companies(group_url, urls)
+    rows = [(group_url, url, row) for group_url, url in state.queued_companies()
+            for row in [history.last_row(url)] if row is not None]
+    state.save_stale(rows)
+    return len(rows)
+
+
+def row_columns(site):
+    return site.columns + ["url"] * ("url" not in site.columns)
+
+
+# The output file (snapshot=True) and the delta against the last published output, from the
+# rows in `state`; removals are only listed when the crawl was `complete`.
+def publish_rows(site, state, history, complete, snapshot=True):
+    log = logging.getLogger(f"data_pipeline.{site.name}")
+    if not complete:
+        log.warning("Crawl incomplete: the delta won't list removed records")
+    delta_path = sibling_path(site.output_path, ".delta" + os.path.splitext(site.output_path)[1])
+    with open_sink(delta_path, ["change"] + row_columns(site)) as delta, \
+            (open_sink(site.output_path, site.columns) if snapshot else nullcontext()) as out:
+        def rows():
+            for row in state.iter_rows(site.group_column):
+                row = site.clean_row(row)
+                if out:
+                    out.write(row)
+                yield row
+
+        for change, row in history.diff(rows(), complete):
+            CHANGES.inc(site=site.name, change=change)
+            delta.write({**row, "change": change})
+    if out:
+        log.info(f"Wrote {out.count} rows to {site.output_path}")
+    log.info(f"Wrote {delta.count} changes to {delta_path}")
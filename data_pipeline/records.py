@@ -0,0 +1,151 @@
+from array import array
+from collections.abc import Mapping
+
+
+# Compact stand-in for a row dict: the values in one tuple, the column names once on the
+# class (record_type). Reads like a read-only dict (row["fax"], row.get(...), dict(row)) so
+# sinks and the state store take it as is, and pickles as (class, values), so rows coming
+# back from the parse workers don't carry every key string with them.
+# Before: {"company name": "X", ..., "employees": "10"} (464 bytes, keys included)
+# → After: CompanyRecord(("X", ..., "10")) (176 bytes)
+class Record(Mapping):
+    __slots__ = ("_values",)
+    fields = ()
+    index = {}
+
+    def __init__(self, values):
+        self._values = tuple(values)
+
+    @classmethod
+    def from_dict(cls, d):
+        return cls(d.get(f) for f in cls.fields)
+
+    def __getitem__(self, key):
+        return self._values[self.index[key]]
+
+    def __iter__(self):
+        return iter(self.fields)
+
+    def __len__(self):
+        return len(self.fields)
+
+    def __reduce__(self):
+        return type(self), (self._values,)
+
+    def __repr__(self):
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+# Assign the result to `name` at module level of `module`, so worker processes can unpickle it:
+#   CompanyRecord = record_type("CompanyRecord", ROW_FIELDS, __name__)
+def record_type(name, fields, module):
+    fields = tuple(fields)
+    return type(name, (Record,), {
+        "__slots__": (), "__module__": module,
+        "fields": fields, "index": {f: i for i, f in enumerate(fields)},
+    })
+
+
+NUMERIC = {int: "q", float: "d"}
+
+
+# Rows accumulated column by column, for handing to pandas or Arrow: each column is its own
+# buffer, so there is no list of row dicts next to the finished frame.
+#   str          list of values; repeated strings share one object while the column looks
+#                repetitive (stops interning once over half its values are distinct)
+#   "category"   int32 codes into the distinct values → pandas Categorical / Arrow dictionary
+#   int, float   array('q' / 'd') plus a validity mask → nullable Int64 / Float64
+# to_pandas() / to_arrow() wrap the numeric and code buffers without copying them (append no
+# more rows after that) and copy the string columns once.
+class Columns:
+    def __init__(self, columns, types=None, intern_limit=100_000):
+        self.columns = list(columns)
+        types = types or {}
+        self.types = [types.get(c, str) for c in self.columns]
+        self.intern_limit = intern_limit
+        self.rows = 0
+        self.buffers, self.masks, self.interned = [], [], []
+        for kind in self.types:
+            if kind == "category":
+                self.buffers.append(array("i"))
+                self.interned.append({})
+            elif kind in NUMERIC:
+                self.buffers.append(array(NUMERIC[kind]))
+                self.interned.append(None)
+            else:
+                self.buffers.append([])
+                self.interned.append({})
+            self.masks.append(bytearray() if kind in NUMERIC else None)
+
+    def __len__(self):
+        return self.rows
+
+    def append(self, row):
+        for i, (c, kind) in enumerate(zip(self.columns, self.types)):
+            v = row.get(c)
+            buf = self.buffers[i]
+            if kind == "category":
+                if v is None:
+                    buf.append(-1)
+                else:
+                    codes = self.interned[i]
+                    buf.append(codes.setdefault(v, len(codes)))
+            elif kind in NUMERIC:
+                ok = v is not None and v != ""
+                buf.append(kind(v) if ok else 0)
+                self.masks[i].append(ok)
+            else:
+                buf.append(self._intern(i, v))
+        self.rows += 1
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+        return self
+
+    def _intern(self, i, v):
+        table = self.interned[i]
+        if table is None or v is None:
+            return v
+        v = table.setdefault(v, v)
+        if len(table) > self.intern_limit or (self.rows >= 1000 and len(table) > self.rows // 2):
+            self.interned[i] = None
+        return v
+
+    def to_pandas(self):
+        import numpy as np
+        import pandas as pd
+
+        data = {}
+        for i, (c, kind) in enumerate(zip(self.columns, self.types)):
+            buf = self.buffers[i]
+            if kind == "category":
+                data[c] = pd.Categorical.from_codes(np.frombuffer(buf, dtype=np.int32), categories=list(self.interned[i]))
+            elif kind in NUMERIC:
+                missing = ~np.frombuffer(self.masks[i], dtype=np.bool_)
+                values = np.frombuffer(buf, dtype=np.int64 if kind is int else np.float64)
+                data[c] = (pd.arrays.IntegerArray if kind is int else pd.arrays.FloatingArray)(values, missing)
+            else:
+                data[c] = pd.array(buf, dtype=object)
+        return pd.DataFrame(data, copy=False)
+
+    def to_arrow(self):
+        try:
+            import numpy as np
+            import pyarrow as pa
+        except ImportError as e:
+            raise ImportError("Arrow output needs pyarrow: pip install pyarrow") from e
+
+        arrays = []
+        for i, kind in enumerate(self.types):
+            buf = self.buffers[i]
+            if kind == "category":
+                codes = np.frombuffer(buf, dtype=np.int32)
+                arrays.append(pa.DictionaryArray.from_arrays(
+                    pa.array(codes, mask=codes < 0), pa.array(list(self.interned[i]), pa.string())))
+            elif kind in NUMERIC:
+                values = np.frombuffer(buf, dtype=np.int64 if kind is int else np.float64)
+                arrays.append(pa.array(values, mask=~np.frombuffer(self.masks[i], dtype=np.bool_)))
+            else:
+                arrays.append(pa.array(buf, pa.string()))
+        return pa.Table.from_arrays(arrays, names=self.columns)
@@ -0,0 +1,107 @@
+import json
+import os
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+# Before: retry_after("120") → After: 120.0; an HTTP-date is turned into seconds from now
+def retry_after_seconds(value):
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+# Exponential backoff with full jitter; a Retry-After from the server wins when it is longer.
+class RetryPolicy:
+    def __init__(self, max_attempts=5, base=1.0, cap=60.0, statuses=RETRY_STATUSES):
+        self.max_attempts = max_attempts
+        self.base = base
+        self.cap = cap
+        self.statuses = frozenset(statuses)
+
+    def delay(self, attempt, retry_after=None):
+        backoff = random.uniform(0, min(self.cap, self.base * 2 ** (attempt - 1)))
+        server = retry_after_seconds(retry_after)
+        return max(backoff, min(server, self.cap * 5)) if server is not None else backoff
+
+
+# Per-host AIMD rate control on top of the host's token bucket: every healthy response
+# nudges the rate up, a 429/503/connection error (or latency far above target) cuts it.
+# Latency and error rate are exponentially weighted so one slow page doesn't swing it.
+class HostHealth:
+    def __init__(self, bucket, min_rate=0.2, max_rate=16.0, target_latency=2.0,
+                 increase=0.05, decrease=0.5, alpha=0.2):
+        self.bucket = bucket
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.target_latency = target_latency
+        self.increase = increase
+        self.decrease = decrease
+        self.alpha = alpha
+        self.latency = None
+        self.error_rate = 0.0
+        self.requests = 0
+        self.errors = 0
+        self._last_cut = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, latency, ok, throttled=False, retry_after=None):
+        with self.lock:
+            self.requests += 1
+            self.errors += not ok
+            self.latency = latency if self.latency is None else (
+                self.alpha * latency + (1 - self.alpha) * self.latency)
+            self.error_rate = self.alpha * (not ok) + (1 - self.alpha) * self.error_rate
+
+            now = time.monotonic()
+            rate = self.bucket.rate
+            if throttled or self.latency > 2 * self.target_latency:
+                # concurrent failures from one slowdown should only cut the rate once
+                if now - self._last_cut > 1.0 / max(rate, 1e-6):
+                    self._last_cut = now
+                    rate = max(self.min_rate, rate * self.decrease)
+            elif ok and self.latency <= self.target_latency:
+                rate = min(self.max_rate, rate + self.increase)
+            self.bucket.set_rate(rate)
+
+        pause = retry_after_seconds(retry_after)
+        if pause:
+            self.bucket.pause(pause)
+
+
+# Permanently failed work as JSON lines, appended as it happens and drained by a later pass.
+class DeadLetterQueue:
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def add(self, item, error, attempts=None):
+        entry = {"item": item, "error": str(error), "attempts": attempts, "at": time.time()}
+        with self.lock, open(self.path, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def entries(self):
+        if not os.path.exists(self.path):
+            return []
+        with self.lock, open(self.path, encoding="utf-8") as fh:
+            return [json.loads(line) for line in fh if line.strip()]
+
+    # Before: 3 lines in the file → After: their items, file emptied for the next round of failures
+    def drain(self):
+        items = [e["item"] for e in self.entries()]
+        with self.lock:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+        return items
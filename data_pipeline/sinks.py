@@ -0,0 +1,143 @@
+import csv
+import json
+import os
+
+from . import metrics
+
+SINK_ROWS = metrics.counter("sink_rows_total", "Rows written out, by sink file", ["sink"])
+SINK_FLUSH = metrics.histogram("sink_flush_seconds", "Time to write one batch", ["sink"])
+
+
+# Rows are appended as they are parsed and written out every `batch_size` rows, so memory
+# stays flat and CSV/JSONL output is readable while the crawl is still running.
+class Sink:
+    default_batch_size = 500
+
+    def __init__(self, path, columns, batch_size=None):
+        self.path = path
+        self.columns = list(columns)
+        self.batch_size = batch_size or self.default_batch_size
+        self.buffer = []
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def write(self, row):
+        self.buffer.append([row.get(c) for c in self.columns])
+        self.count += 1
+        if len(self.buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            name = os.path.basename(self.path)
+            with SINK_FLUSH.time(sink=name):
+                self._write_batch(self.buffer)
+            SINK_ROWS.inc(len(self.buffer), sink=name)
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        self._close()
+
+    def _write_batch(self, batch):
+        raise NotImplementedError
+
+    def _close(self):
+        pass
+
+
+class CsvSink(Sink):
+    def __init__(self, path, columns, batch_size=None):
+        super().__init__(path, columns, batch_size)
+        self.fh = open(path, "w", newline="", encoding="utf-8")
+        self.writer = csv.writer(self.fh)
+        self.writer.writerow(self.columns)
+
+    def _write_batch(self, batch):
+        self.writer.writerows(batch)
+        self.fh.flush()
+
+    def _close(self):
+        self.fh.close()
+
+
+# append=True adds to the rows already in the file (a resumed run's partial file)
+class JsonlSink(Sink):
+    def __init__(self, path, columns, batch_size=None, append=False):
+        super().__init__(path, columns, batch_size)
+        self.fh = open(path, "a" if append else "w", encoding="utf-8")
+
+    def _write_batch(self, batch):
+        self.fh.writelines(
+            json.dumps(dict(zip(self.columns, values)), ensure_ascii=False) + "\n" for values in batch
+        )
+        self.fh.flush()
+
+    def _close(self):
+        self.fh.close()
+
+
+# One row group per flushed batch; all columns are stored as nullable strings.
+class ParquetSink(Sink):
+    default_batch_size = 10_000
+
+    def __init__(self, path, columns, batch_size=None):
+        super().__init__(path, columns, batch_size)
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise ImportError("Parquet output needs pyarrow: pip install pyarrow") from e
+        self.pa = pa
+        self.schema = pa.schema([(c, pa.string()) for c in self.columns])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def _write_batch(self, batch):
+        arrays = [
+            self.pa.array([None if r[i] is None else str(r[i]) for r in batch], self.pa.string())
+            for i in range(len(self.columns))
+        ]
+        self.writer.write_table(self.pa.Table.from_arrays(arrays, schema=self.schema))
+
+    def _close(self):
+        self.writer.close()
+
+
+# openpyxl write-only mode streams rows to a temp file instead of keeping every cell object
+# in memory; the workbook itself is only valid once the sink is closed.
+class ExcelSink(Sink):
+    def __init__(self, path, columns, batch_size=None):
+        super().__init__(path, columns, batch_size)
+        from openpyxl import Workbook
+
+        self.wb = Workbook(write_only=True)
+        self.ws = self.wb.create_sheet("Sheet1")
+        self.ws.append(self.columns)
+
+    def _write_batch(self, batch):
+        for values in batch:
+            self.ws.append(values)
+
+    def _close(self):
+        self.wb.save(self.path)
+
+
+SINKS = {
+    ".csv": CsvSink,
+    ".jsonl": JsonlSink,
+    ".parquet": ParquetSink,
+    ".xlsx": ExcelSink,
+}
+
+
+# Before: open_sink("yp8.xlsx", cols) → After: ExcelSink; ".csv"/".jsonl"/".parquet" pick the others
+def open_sink(path, columns, batch_size=None):
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in SINKS:
+        raise ValueError(f"Unsupported output format {ext!r} (expected one of {', '.join(SINKS)})")
+    return SINKS[ext](path, columns, batch_size)
@@ -0,0 +1,79 @@
+from .parsing import make_soup
+
+
+# A site adapter declares what to crawl and how to read it; data_pipeline.pipeline.run does
+# the rest (session, cache, rate limits, retries, checkpointing, parse pool, sinks, metrics).
+#
+# The crawl has two levels. Groups are the site's categories or listing sections, saved in
+# the state so finished ones are skipped on resume. Items are the pages that become rows.
+# An item is a tuple (group_url, group_label, url, ...): it is sent to `parse` in the worker
+# processes together with the page bytes, so it must stay picklable.
+class Site:
+    name = None
+    base_url = None
+    headers = {}
+    verify = True
+    http2 = True
+
+    columns = []
+    output_path = None
+    state_path = None
+    history_path = None      # body and row hashes of earlier runs; default <output>.history.db
+    group_column = None      # row column replaced by every group a page was listed under ("A; B")
+    column_types = {}        # records.Columns types for load_rows, e.g. {"category": "category"}
+    category_weights = {}    # item category (item[1]) → priority weight for scheduled runs (default 1.0)
+    name_column = None       # consolidate: rows with the same normalized name and first phone are one record
+    phone_columns = []
+    phone_separator = ", "   # between the numbers of one cell
+
+    max_concurrency = 8
+    per_host_concurrency = 4
+    requests_per_sec = 2.0   # starting rate; adapts per host between the two below
+    min_requests_per_sec = 0.2
+    max_requests_per_sec = None
+    burst = 2
+    max_attempts = 5
+    max_body_bytes = 8 * 1024 * 1024   # pages past this fail (fetcher.BodyTooLarge) instead of being read
+    page_until = None        # parsing.until(...): item pages are read only up to where their content ends
+    parse_workers = None     # default: one per CPU
+    parse_queue_size = 64
+    discovery_parallelism = 4
+
+    # module-level function(item, html) -> row (dict or records.Record); wrap it in staticmethod()
+    parse = None
+
+    # Before: AzerbaijanYP(base_url="http://127.0.0.1:8765", output_path="x.csv") → After: the
+    # same adapter pointed at a stub server, writing CSV
+    def __init__(self, **settings):
+        for k, v in settings.items():
+            if not hasattr(self, k):
+                raise TypeError(f"{type(self).__name__} has no setting {k!r}")
+            setattr(self, k, v)
+
+    def fetch(self, crawl, url, parse_only=None, until=None):
+        r = crawl.engine.get(url, until=until, timeout=30)
+        r.raise_for_status()
+        return r.content if parse_only is None else make_soup(r.content, parse_only)
+
+    # [{"group": label, "url": group_url}, ...] in output order
+    def groups(self, crawl):
+        raise NotImplementedError
+
+    # Distributed mode: the groups split into the coordinator's tasks, each crawled by one
+    # worker. A shard is a group dict (same "group" and "url") that collect() understands;
+    # by default one task per group.
+    def shards(self, crawl, groups):
+        return groups
+
+    # the group's pages still to parse, as items; queue them in crawl.state (add_companies /
+    # save_page) so they are fetched once across groups and runs
+    def collect(self, crawl, group):
+        raise NotImplementedError
+
+    # item for a page that failed earlier in this run, for the retry pass
+    def item(self, group, url):
+        return group["url"], group["group"], url
+
+    # final touch on each output row
+    def clean_row(self, row):
+        return row
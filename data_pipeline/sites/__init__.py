@@ -0,0 +1,4 @@
+from .azerbaijanyp import AzerbaijanYP
+from .marsol import Marsol
+
+SITES = {site.name: site for site in (AzerbaijanYP, Marsol)}
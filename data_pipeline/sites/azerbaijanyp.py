@@ -0,0 +1,328 @@
+import re
+from urllib.parse import urljoin, urlsplit
+
+import urllib3
+
+from ..parsing import make_soup, only, until
+from ..phones import normalize_az_phone
+from ..records import record_type
+from ..site import Site
+
+COLUMNS = [
+    "company name",
+    "category",
+    "address",
+    "contact number 1",
+    "contact number 2",
+    "contact numbers (others)",
+    "phone number",
+    "fax",
+    "establishment year",
+    "employees",
+    "website address",
+]
+
+# one parsed company page; COLUMNS plus the page URL
+CompanyRecord = record_type("CompanyRecord", COLUMNS + ["url"], __name__)
+
+# only the containers each page type is read from get built into the tree
+BROWSE_ONLY = only(classes=["icats"])
+CATEGORY_ONLY = only(names=["a"], classes=["company"])
+COMPANY_ONLY = only(classes=["info"], ids=["company_name", "company_address"])
+# company pages end their info blocks at the footer; nothing after it is read
+COMPANY_UNTIL = until(classes=["footer"], after=["company_name"])
+
+
+def clean_text(a):
+    return a.get_text(" ", strip=True) if a else None
+
+# Before: soup.find("div", class_="label", string=...) once per field → After: one walk,
+# {"contact number": <div class="label">Contact number</div>, ...}; first label wins like find()
+def label_index(soup):
+    labels = {}
+    for lab in soup.find_all("div", class_="label"):
+        s = lab.string
+        if s and s.strip():
+            labels.setdefault(s.strip().lower(), lab)
+    return labels
+
+def by_label_text(labels, label_text):
+    lab = labels.get(label_text.lower())
+    if not lab:
+        return None
+
+    sib = lab.find_next_sibling("div", class_="text")
+    if sib:
+        tel = sib.select_one("a[href^='tel:']")
+        if tel:
+            return clean_text(tel)
+        a = sib.select_one("a[href]")
+        if a:
+            return clean_text(a)
+        return clean_text(sib)
+
+    cont = lab.find_parent("div", class_="info")
+    if cont:
+        parts = list(cont.stripped_strings)
+        if parts and parts[0].strip().lower() == label_text.lower():
+            parts = parts[1:]
+        return " ".join(parts) if parts else None
+
+    return None
+
+def phones_by_label(labels, label_text):
+    lab = labels.get(label_text.lower())
+    if not lab:
+        return None
+
+    nums = []
+
+    tx = lab.find_next_sibling("div", class_="text")
+    if tx:
+        for a in tx.select("a[href^='tel:']"):
+            v = a.get_text(" ", strip=True)
+            if v:
+                nums.append(v)
+        if not nums:
+            nums = [s for s in (s.strip() for s in tx.stripped_strings) if s]
+
+    if not nums:
+        cont = lab.find_parent("div", class_="info")
+        if cont:
+            parts = list(cont.stripped_strings)
+            if parts and parts[0].strip().lower() == label_text.lower():
+                parts = parts[1:]
+            nums = parts
+
+    seen, out = set(), []
+    for n in nums:
+        std = normalize_az_phone(n)
+        if std and std not in seen:
+            seen.add(std)
+            out.append(std)
+
+    return ", ".join(out) if out else None
+
+def split_contact_three(numbers_str: str):
+    if not numbers_str:
+        return None, None, None
+    parts = [p.strip() for p in numbers_str.split(",") if p.strip()]
+    first  = parts[0] if len(parts) > 0 else None
+    second = parts[1] if len(parts) > 1 else None
+    rest   = ", ".join(parts[2:]) if len(parts) > 2 else None
+    return first, second, rest
+
+
+def extract_all_categories(soup, base):
+    out = []
+    for ul in soup.select("ul.icats"):
+        for li in ul.find_all("li", recursive=False):
+            if li.find("div", class_="icats_empty"):
+                continue
+            a = li.find("a", href=True)
+            if not a:
+                continue
+            span = a.find("span")
+            if span:
+                span.decompose()
+            cat_name = clean_text(a)
+            out.append({
+                "group": cat_name,
+                "url": urljoin(base, a["href"])
+            })
+    return out
+
+def find_next_page_url(soup, base):
+    nxt = soup.select_one("a.pages_arrow[rel='next']")
+    return urljoin(base, nxt["href"]) if nxt and nxt.has_attr("href") else None
+
+def company_links(soup, base):
+    out = []
+    for a in soup.select("div.company[data-cmpid] h3 a[href]"):
+        raw = (a.get("href") or "").strip()
+        if raw:
+            out.append(urljoin(base, raw))
+    return out
+
+# Before: ".../category/banks/2" → After: 2; None for a URL that isn't a numbered page of the category
+def page_number(url, category_url):
+    path = re.escape(urlsplit(category_url).path.rstrip("/"))
+    m = re.match(rf"^{path}/(\d+)/?$", urlsplit(url).path)
+    return int(m.group(1)) if m else None
+
+# Before: ".../category/banks" page with links to /category/banks/2 … /category/banks/9
+# → After: {2: ".../category/banks/2", ..., 9: ".../category/banks/9"}
+def listing_page_urls(soup, category_url, base):
+    pages = {}
+    for a in soup.select("a[href]"):
+        href = urljoin(base, a["href"].strip())
+        n = page_number(href, category_url)
+        if n is not None:
+            pages.setdefault(n, href)
+    return pages
+
+# All listing pages the first page links to are fetched at once; pages further out (when
+# the pagination only shows a window) are picked up from those and fetched in the next round.
+# The pages each round read are saved, so an interrupted category resumes with the rest. When
+# the last page's rel=next link isn't a numbered page (another pagination form), the rest is
+# left to the rel=next walk from there.
+def discover_company_links(crawl, category_url):
+    site, engine, state, log = crawl.site, crawl.engine, crawl.state, crawl.log
+    progress = state.page_progress(category_url)
+    if progress and progress[1] is None:
+        return state.company_urls(category_url)
+    if progress:
+        return collect_company_links_for_category(crawl, category_url)
+
+    pages = state.listing_pages(category_url) or {1: (category_url, False)}
+    read = sum(done for _, done in pages.values())
+    if read:
+        log.info(f"[CAT] Resuming {category_url}: {read} of {len(pages)} known listing pages read")
+    nexts = {}
+    while True:
+        todo = {n: u for n, (u, done) in pages.items() if not done}
+        if not todo:
+            break
+        if len(todo) > 1:
+            log.info(f"[CAT] Fetching {len(todo)} listing pages of {category_url} (up to page {max(todo)})")
+        numbers = {u: n for n, u in todo.items()}
+        read, found, error = {}, {}, None
+        for page_url, soup, err in engine.map(lambda u: site.fetch(crawl, u, CATEGORY_ONLY), todo.values()):
+            if err:
+                error = error or err
+                continue
+            state.add_companies(category_url, company_links(soup, site.base_url))
+            read[numbers[page_url]] = page_url
+            nexts[numbers[page_url]] = find_next_page_url(soup, site.base_url)
+            for n, u in listing_page_urls(soup, category_url, site.base_url).items():
+                if n not in pages:
+                    found.setdefault(n, u)
+        state.save_listing_pages(category_url, read, found)
+        if error:
+            raise error
+        pages.update({n: (u, True) for n, u in read.items()})
+        pages.update({n: (u, False) for n, u in found.items()})
+
+    last = max(pages)
+    if last not in nexts:  # read before a restart
+        nexts[last] = find_next_page_url(site.fetch(crawl, pages[last][0], CATEGORY_ONLY), site.base_url)
+    if nexts[last] and page_number(nexts[last], category_url) is None:
+        log.info(f"[CAT] {category_url}: no numbered page after {last}, following rel=next")
+        state.save_page(category_url, last, nexts[last], [])
+        return collect_company_links_for_category(crawl, category_url)
+    urls = state.company_urls(category_url)
+    log.info(f"[CAT] {category_url}: {len(pages)} pages, {len(urls)} companies")
+    state.save_page(category_url, len(pages), None, [])
+    return urls
+
+# rel=next one listing page at a time, resumable mid-category
+def collect_company_links_for_category(crawl, category_url):
+    site, state, log = crawl.site, crawl.state, crawl.log
+    urls, seen = [], set()
+    url = category_url
+    page_no = 0
+    progress = state.page_progress(category_url)
+    if progress:
+        page_no, url = progress
+        urls = state.company_urls(category_url)
+        seen = set(urls)
+        if url:
+            log.info(f"[CAT] Resuming at page {page_no + 1} ({len(urls)} companies already queued)")
+    while url:
+        page_no += 1
+        log.info(f"[CAT] Page {page_no} => {url}")
+        soup = site.fetch(crawl, url, CATEGORY_ONLY)
+
+        before = len(urls)
+        for href in company_links(soup, site.base_url):
+            if href not in seen:
+                seen.add(href)
+                urls.append(href)
+        log.info(f"[CAT] Page {page_no} found {len(urls)-before} companies (total: {len(urls)})")
+
+        url = find_next_page_url(soup, site.base_url)
+        state.save_page(category_url, page_no, url, urls[before:])
+    return urls
+
+
+# runs in the ParsePool worker processes: raw page bytes in, CompanyRecord out
+def parse_company_html(url, html, category=None):
+    soup = make_soup(html, COMPANY_ONLY)
+    labels = label_index(soup)
+
+    name = clean_text(soup.select_one("#company_name")) or by_label_text(labels, "Company name")
+
+    address = clean_text(soup.select_one("#company_address")) or by_label_text(labels, "Address")
+
+    contact_all = phones_by_label(labels, "Contact number")
+    contact_1, contact_2, contact_rest = split_contact_three(contact_all)
+    phone_number = phones_by_label(labels, "Mobile phone")
+    website_address = by_label_text(labels, "Website address")
+
+    fax = phones_by_label(labels, "Fax")
+    establishment_year = by_label_text(labels, "Establishment year")
+    employees = by_label_text(labels, "Employees")
+
+    return CompanyRecord.from_dict({
+        "company name": name,
+        "category": category,
+        "address": address,
+        "url": url,
+        # "contact number": contact_number,
+        "contact number 1": contact_1,
+        "contact number 2": contact_2,
+        "contact numbers (others)": contact_rest,
+        "phone number": phone_number,
+        "website address": website_address,
+        "fax": fax,
+        "establishment year": establishment_year,
+        "employees": employees,
+    })
+
+# items are (category_url, group, company_url)
+def parse_listed_company(item, html):
+    return parse_company_html(item[2], html, item[1])
+
+
+class AzerbaijanYP(Site):
+    name = "azerbaijanyp"
+    base_url = "https://www.azerbaijanyp.com"
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+                      "AppleWebKit/537.36 (KHTML, like Gecko) "
+                      "Chrome/124.0 Safari/537.36"
+    }
+    verify = False           # the site's certificate chain does not validate
+
+    columns = COLUMNS
+    output_path = "yp8.xlsx"
+    state_path = "yp_state.db"
+    history_path = "yp_history.db"
+    group_column = "category"
+    column_types = {"category": "category"}
+    name_column = "company name"  # snapshots have no url column: consolidate matches them by contact
+    phone_columns = ["contact number 1", "phone number"]
+
+    max_concurrency = 16
+    per_host_concurrency = 8
+    requests_per_sec = 4.0
+    max_requests_per_sec = 16.0
+    burst = 4
+    parallel_discovery = True   # False: follow rel=next one listing page at a time
+    page_until = COMPANY_UNTIL
+
+    parse = staticmethod(parse_listed_company)
+
+    def __init__(self, **settings):
+        super().__init__(**settings)
+        if not self.verify:
+            urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+    def groups(self, crawl):
+        soup = self.fetch(crawl, f"{self.base_url}/browse-business-directory", BROWSE_ONLY)
+        return extract_all_categories(soup, self.base_url)
+
+    def collect(self, crawl, group):
+        collect = discover_company_links if self.parallel_discovery else collect_company_links_for_category
+        collect(crawl, group["url"])
+        return [self.item(group, u) for u in crawl.state.pending_companies(group["url"])]
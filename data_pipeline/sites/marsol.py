@@ -0,0 +1,382 @@
+import re, unicodedata
+from functools import lru_cache
+from urllib.parse import urljoin
+
+from bs4 import Tag
+
+from ..frontier import canonicalize_url
+from ..parsing import make_soup, only
+from ..phones import PhoneSet
+from ..records import record_type
+from ..site import Site
+
+# Before: "5. Ünvan" → After: "Ünvan"
+@lru_cache(maxsize=4096)
+def lstrip_to_first_alpha(s):
+    s = (s or "").strip()
+    for i, ch in enumerate(s):
+        if ch.isalpha():
+            return s[i:]
+    return s
+
+# Before: "İnstagram" → After: "instagram"
+@lru_cache(maxsize=4096)
+def norm_key(txt):
+    s = unicodedata.normalize("NFKD", (txt or "").casefold())
+    return "".join(ch for ch in s if not unicodedata.combining(ch))
+
+# Before: existing="+994 12 123 45 67", new="+ 994 50 765 43 21" → After: "+994 12 123 45 67; +994 50 765 43 21"
+# (a PhoneSet, str() gives the "; "-joined value; the same number spelled twice is kept once)
+def phone_extractor(existing, newval):
+    phones = existing if isinstance(existing, PhoneSet) else PhoneSet([existing] if existing else [])
+    phones.add(newval)
+    return phones
+
+# Before: "  Bakı ,  Azərbaycan  " → After: "Bakı ,  Azərbaycan"
+def address_extractor(v):
+    return (v or "").strip()
+
+# Before: "<strong>Facebook</strong> : <a href='https://fb.com/page'>…</a>" → After: "https://fb.com/page"
+# Before: "<strong>İnstagram:</strong> soel.parfum" → After: "soel.parfum"
+# (`siblings` are the nodes between the label's <strong> and the next one)
+def social_extractor(siblings, inline_text, follow_text):
+    for sib in siblings:
+        if isinstance(sib, Tag):
+            a = sib if (sib.name == "a" and sib.has_attr("href")) else sib.find("a", href=True)
+            if a:
+                return (a.get("href") or a.get_text(" ", strip=True) or "").strip()
+    return (inline_text + " " + follow_text).strip()
+
+# Before: "www.example.az" → After: "www.example.az"
+def web_extractor(v):
+    return (v or "").strip()
+
+# Before: '<span class="__cf_email__" data-cfemail="...">[email protected]</span>' → After: "[email protected]"
+# Before: "e-mail: contact@gilasoptic.az" → After: "contact@gilasoptic.az"
+# Before: "<strong>E-mail:</strong> info@foo.az" → After: "info@foo.az"
+def email_extractor(siblings, inline_text, follow_text):
+    for sib in siblings:
+        if isinstance(sib, Tag):
+            a = sib if (sib.name == "a") else sib.find("a") or sib
+            txt = a.get_text(" ", strip=True)
+            if txt:
+                return txt.strip()
+    return (inline_text + " " + follow_text).strip()
+
+# the article box holds the fields; "Sayta keçid" links can sit in any h3/p on the page
+PARTNER_ONLY = only(names=["h3", "p"], classes=["financity-single-article-content"])
+
+ALIAS = {
+    "unvan": "address",
+    "telefon": "telefon",
+    "mobil": "mobil",
+    "instagram": "instagram",
+    "facebook": "facebook",
+    "web": "web", "veb": "web", "sayt": "web",
+    "e-mail": "email", "email": "email", "mail": "email",
+    "e-mektub": "email", "e-məktub": "email", "e-poct": "email", "e-poçt": "email",
+}
+
+LABEL_SEP = re.compile(r"\s*(?:,|/| və )\s*")
+INLINE_INSTAGRAM = re.compile(r"(?:İnstagram|Instagram)\s*:\s*([^\s,;]+)", re.I)
+
+# Before: "E-poçt" → After: "email"; labels outside ALIAS map to their norm_key ("Qeyd" → "qeyd")
+@lru_cache(maxsize=4096)
+def canon_key(label):
+    k = norm_key(label)
+    return ALIAS.get(k, k)
+
+# Before: "<strong>Telefon ：</strong>" → After: "Telefon :"
+def strong_text(tag):
+    return tag.get_text(" ", strip=True).replace("\xa0", " ").replace("：", ":").strip()
+
+# One <strong> label and what follows it up to the next <strong>, read in a single sibling walk.
+class StrongField:
+    __slots__ = ("text", "key", "siblings", "inline", "follow", "value")
+
+    def __init__(self, s):
+        self.text = stxt = strong_text(s)
+        if ":" in stxt:
+            key_raw, self.inline = (t.strip() for t in stxt.split(":", 1))
+        else:
+            key_raw, self.inline = stxt, ""
+        self.key = lstrip_to_first_alpha(key_raw).rstrip(":").strip()
+
+        self.siblings, segs, nxt = [], [], None
+        for sib in s.next_siblings:
+            if isinstance(sib, Tag) and sib.name == "strong":
+                nxt = sib
+                break
+            self.siblings.append(sib)
+            t = sib.get_text(" ", strip=True) if isinstance(sib, Tag) else str(sib)
+            t = t.replace("\xa0", " ").strip()
+            if not t:
+                continue
+            if not segs and t.startswith(":"):
+                t = t[1:].lstrip()
+                if not t:
+                    continue
+            segs.append(t)
+        self.follow = " ".join(segs).strip()
+        self.value = v = self.inline or self.follow
+
+        # "<strong>Telefon</strong><strong>: 012 …</strong>": the value sits in the next label
+        if not v and nxt:
+            cand = strong_text(nxt)
+            if cand.startswith(":"):
+                v = cand.lstrip(":").strip()
+            elif ":" not in cand:
+                v = cand
+            else:
+                pre, post = (t.strip() for t in cand.split(":", 1))
+                if not pre or norm_key(lstrip_to_first_alpha(pre)) not in ALIAS:
+                    v = post
+            self.value = v
+
+    def is_label(self):
+        return ":" in self.text or norm_key(self.key) in ALIAS
+
+    def labels(self):
+        return [lstrip_to_first_alpha(x.strip()) for x in LABEL_SEP.split(self.key) if x.strip()]
+
+# How a value lands in `mapped` for each canonical field. Phones accumulate; everything else
+# keeps the first value seen.
+def _add_phone(mapped, canon, v):
+    mapped[canon] = phone_extractor(mapped.get(canon, ""), v)
+
+def _first(extract, require_value=False):
+    def put(mapped, canon, v):
+        if canon not in mapped and (v or not require_value):
+            mapped[canon] = extract(v)
+    return put
+
+def _strong_email(mapped, canon, f):
+    if canon not in mapped:
+        mapped[canon] = email_extractor(f.siblings, f.inline, f.follow)
+
+def _strong_social(mapped, canon, f):
+    sv = social_extractor(f.siblings, f.inline, f.follow)
+    if sv and canon not in mapped:
+        mapped[canon] = sv
+    if canon == "facebook":
+        m = INLINE_INSTAGRAM.search((f.inline + " " + f.follow).strip())
+        if m and "instagram" not in mapped:
+            mapped["instagram"] = m.group(1).strip()
+
+def _strong_value(put):
+    return lambda mapped, canon, f: put(mapped, canon, f.value)
+
+# <strong>Label:</strong> value
+STRONG_FIELDS = {
+    "telefon": _strong_value(_add_phone),
+    "mobil": _strong_value(_add_phone),
+    "email": _strong_email,
+    "instagram": _strong_social,
+    "facebook": _strong_social,
+    "web": _strong_value(_first(web_extractor, require_value=True)),
+    "address": _strong_value(_first(address_extractor, require_value=True)),
+}
+STRONG_OTHER = _strong_value(_first(str.strip, require_value=True))
+
+# plain "Label: value" lines of a block's text; only known fields are taken
+LINE_FIELDS = {
+    "telefon": _add_phone,
+    "mobil": _add_phone,
+    "email": _first(str.strip),
+    "instagram": _first(str.strip),
+    "facebook": _first(str.strip),
+    "web": _first(web_extractor),
+    "address": _first(address_extractor),
+}
+
+# a label-less <strong> right after a field continues it ("Ünvan: Bakı" <strong>Nizami küç.</strong>)
+def _continue(mapped, field, cont):
+    if field in ("telefon", "mobil"):
+        _add_phone(mapped, field, cont)
+    elif field in ("facebook", "instagram", "web", "address"):
+        prev = mapped.get(field, "") or ""
+        if cont not in prev:
+            mapped[field] = (prev + (" " if prev else "") + cont).strip()
+
+COLUMNS = [
+    'company', 'category', 'url',
+    'address', 'telefon', 'mobil',
+    'email', 'web', 'facebook', 'instagram'
+]
+
+PartnerRecord = record_type("PartnerRecord", COLUMNS, __name__)
+
+
+# Before: messy DOM (colon outside, next-strong, <br> lists, embeds) → After: clean PartnerRecord
+# One walk over the box's p/li blocks: <strong> labels are applied as they are met, the
+# "Label: value" lines are collected and applied after them (labels take precedence).
+# Items are (listing_url, category, url, company). Module-level so it runs in the ParsePool workers.
+def parse_partner_page(item, html):
+    _, category, url, company = item
+    d = make_soup(html, PARTNER_ONLY)
+    mapped, last_field, lines = {}, None, []
+    box = d.select_one("div.financity-single-article-content")
+
+    if box:
+        for blk in box.select("p, li"):
+            for s in blk.find_all("strong"):
+                if s.find_parent("strong") is not None:
+                    continue
+                f = StrongField(s)
+                if f.is_label():
+                    labels = f.labels()
+                    for lab in labels:
+                        canon = canon_key(lab)
+                        STRONG_FIELDS.get(canon, STRONG_OTHER)(mapped, canon, f)
+                        last_field = canon if len(labels) == 1 else last_field
+                elif f.text:
+                    _continue(mapped, last_field, f.text)
+
+            flat = blk.get_text("\n", strip=True).replace("\xa0", " ")
+            lines.extend(x for x in flat.split("\n") if ":" in x)
+
+        for line in lines:
+            k, v = (t.strip() for t in line.split(":", 1))
+            canon = canon_key(lstrip_to_first_alpha(k))
+            put = LINE_FIELDS.get(canon)
+            if put:
+                put(mapped, canon, v)
+
+        for w in box.select("figure .wp-block-embed__wrapper, .wp-block-embed__wrapper"):
+            txt = (w.get_text(" ", strip=True) or "").strip()
+            if not txt:
+                continue
+            if "instagram.com" in txt and "instagram" not in mapped:
+                mapped["instagram"] = txt
+            elif "facebook.com" in txt and "facebook" not in mapped:
+                mapped["facebook"] = txt
+            elif "web" not in mapped:
+                mapped["web"] = txt
+
+    if "web" not in mapped:
+        sayta = d.find(lambda t: hasattr(t, "get_text") and t.name in ("h3", "p") and "Sayta keçid" in t.get_text())
+        if sayta:
+            a = sayta.find("a", href=True)
+            if a:
+                mapped["web"] = (a.get("href") or a.get_text(" ", strip=True) or "").strip()
+
+    return PartnerRecord.from_dict({
+        "company": company,
+        "url": url,
+        "category": category,
+        "address": mapped.get("address", ""),
+        "telefon": str(mapped.get("telefon", "")),
+        "mobil": str(mapped.get("mobil", "")),
+        "instagram": mapped.get("instagram", ""),
+        "facebook": mapped.get("facebook", ""),
+        "web": mapped.get("web", ""),
+        "email": mapped.get("email", ""),
+    })
+
+# listing pages: only the post cards and (on page 1) the pagination links are built
+LISTING_ONLY = only(names=["a"], classes=["gdlr-core-blog-grid-content-wrap"])
+LAST_PAGE = re.compile(r"/page/(\d+)/?$")
+
+# Before: <div class="gdlr-core-blog-grid-content-wrap"><h3><a href="…/foo/">Foo</a></h3>… → After: ("Foo", "…/foo/", "Cat A | Cat B")
+def listing_cards(soup):
+    cards = []
+    for card in soup.select("div.gdlr-core-blog-grid-content-wrap"):
+        a = card.select_one("h3 a[href]")
+        if not a:
+            continue
+        t = a.get_text(strip=True)
+        u = a["href"]
+        cat = " | ".join(x.get_text(strip=True)
+                         for x in card.select(".gdlr-core-blog-info-category a")) or ""
+        cards.append((t, u, cat))
+    return cards
+
+def listing_page_url(listing_url, n):
+    return listing_url if n == 1 else urljoin(listing_url, f"page/{n}/")
+
+def last_listing_page(soup):
+    last_page = 1
+    for a in soup.select('a[href*="/partnyorlarimiz/page/"]'):
+        m = LAST_PAGE.search(a.get("href", ""))
+        if m:
+            last_page = max(last_page, int(m.group(1)))
+    return last_page
+
+
+
+class Marsol(Site):
+    name = "marsol"
+    base_url = "https://marsol.az"
+    headers = {
+        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36",
+        "Accept-Language": "ru-RU,ru;q=0.9,en;q=0.8",
+    }
+
+    columns = COLUMNS
+    output_path = "partners13.xlsx"
+    state_path = "marsol_state.db"
+    history_path = "marsol_history.db"
+    column_types = {"category": "category"}
+    name_column = "company"
+    phone_columns = ["telefon", "mobil"]
+    phone_separator = "; "   # PhoneSet
+
+    max_concurrency = 8
+    per_host_concurrency = 8
+    requests_per_sec = 4.0
+    burst = 4
+    shard_pages = 10         # listing pages per distributed task
+
+    parse = staticmethod(parse_partner_page)
+
+    def __init__(self, **settings):
+        super().__init__(**settings)
+        self.cards = {}   # canonical url -> (company, category) from the listing
+
+    def groups(self, crawl):
+        return [{"group": "Partnyorlarımız", "url": f"{self.base_url}/partnyorlarimiz/"}]
+
+    # Before: pages 1..last_page one at a time → After: all pages in flight at once; cards are
+    # still queued in page order, a partner listed twice once. A shard's group carries
+    # "pages": [first, last] and collects only those.
+    def collect(self, crawl, group):
+        first, last = group.get("pages") or (1, None)
+        pages = {}
+        if last is None:
+            soup = self.fetch(crawl, group["url"], LISTING_ONLY)
+            pages[1] = listing_cards(soup)
+            last = last_listing_page(soup)
+            crawl.log.info(f"last_page: {last}")
+        todo = [n for n in range(first, last + 1) if n not in pages]
+        fetch = lambda n: self.fetch(crawl, listing_page_url(group["url"], n), LISTING_ONLY)
+        for n, soup, err in crawl.engine.map(fetch, todo):
+            if err:
+                raise err
+            pages[n] = listing_cards(soup)
+        for n in sorted(pages):
+            for t, u, cat in pages[n]:
+                self.cards.setdefault(canonicalize_url(u), (t, cat))
+            crawl.state.add_companies(group["url"], [u for _, u, _ in pages[n]])
+        crawl.log.info(f"TOTAL listing URLs: {len(self.cards)}")
+        return [self.item(group, u) for u in crawl.state.pending_companies(group["url"])]
+
+    # Before: one group, 23 listing pages, shard_pages=10 → After: shards with pages [1, 10],
+    # [11, 20], [21, 23]
+    def shards(self, crawl, groups):
+        out = []
+        for group in groups:
+            last = last_listing_page(self.fetch(crawl, group["url"], LISTING_ONLY))
+            out += [{**group, "pages": [n, min(n + self.shard_pages - 1, last)]}
+                    for n in range(1, last + 1, self.shard_pages)]
+        return out
+
+    def item(self, group, url):
+        company, category = self.cards.get(url, ("", ""))
+        return group["url"], category, url, company
+
+    # Before: {"company": " Foo ", "email": ""} → After: {"company": "Foo", "email": None}
+    def clean_row(self, row):
+        row = {k: (None if v == '' else v) for k, v in row.items()}
+        if row['company'] is not None:
+            row['company'] = row['company'].strip()
+        return row
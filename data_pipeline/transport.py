@@ -0,0 +1,119 @@
+import requests
+from requests.adapters import BaseAdapter, HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.util import make_headers
+
+try:
+    import h2  # noqa: F401  (httpx needs it for http2=True)
+    import httpx
+    HTTP2_AVAILABLE = True
+except ImportError:
+    httpx = None
+    HTTP2_AVAILABLE = False
+
+# "gzip,deflate", plus "br" / "zstd" when brotli / zstandard are installed; urllib3 decodes
+# whatever it advertises
+ACCEPT_ENCODING = make_headers(accept_encoding=True)["accept-encoding"]
+
+# a few hosts per script; each keeps up to pool_size warm connections
+POOL_HOSTS = 8
+
+
+# HTTP/2 for a requests.Session: one multiplexed connection per host carries all the
+# concurrent requests of the fetch threads. Responses come back as requests.Response and
+# transport errors as requests.ConnectionError / Timeout, so sessions, CachedSession and
+# FetchEngine work unchanged. TLS verification is per adapter (httpx sets it per client).
+class Http2Adapter(BaseAdapter):
+    def __init__(self, pool_size=16, verify=True, keepalive_expiry=30.0):
+        super().__init__()
+        if not HTTP2_AVAILABLE:
+            raise ImportError("HTTP/2 needs httpx with the h2 extra: pip install 'httpx[http2]'")
+        limits = httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size,
+                              keepalive_expiry=keepalive_expiry)
+        self.client = httpx.Client(http2=True, verify=verify, limits=limits, follow_redirects=False)
+
+    # Before: timeout=(3.05, 30) → After: httpx.Timeout(30, connect=3.05)
+    @staticmethod
+    def _timeout(timeout):
+        if isinstance(timeout, tuple):
+            connect, read = timeout
+            return httpx.Timeout(read, connect=connect)
+        return httpx.Timeout(timeout)
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        try:
+            resp = self.client.send(self.client.build_request(
+                request.method, request.url, headers=dict(request.headers), content=request.body,
+                timeout=self._timeout(timeout)), stream=stream)
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(e, request=request)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=request)
+
+        r = requests.Response()
+        r.status_code = resp.status_code
+        r.headers = CaseInsensitiveDict(resp.headers.items())
+        r.encoding = get_encoding_from_headers(r.headers)
+        r.reason = resp.reason_phrase
+        r.url = str(resp.url)
+        r.request = request
+        r.connection = self
+        if stream:
+            r.raw = _Http2Body(resp, request)
+        else:
+            r._content = resp.content
+        return r
+
+    def close(self):
+        self.client.close()
+
+
+# r.raw of a stream=True response: read() hands requests' iter_content the next decoded chunk.
+# Closing it early resets just this stream; the connection carries on.
+class _Http2Body:
+    def __init__(self, resp, request):
+        self.resp = resp
+        self.request = request
+        self.chunks = resp.iter_bytes()
+
+    def read(self, size=None):
+        try:
+            return next(self.chunks, b"")
+        except httpx.TimeoutException as e:
+            raise requests.Timeout(e, request=self.request)
+        except httpx.TransportError as e:
+            raise requests.ConnectionError(e, request=self.request)
+
+    def close(self):
+        self.resp.close()
+
+
+# Before: FetchEngine(session, max_concurrency=16) on a default session (10 pooled connections)
+# → After: every fetch thread gets a kept-alive connection, no per-request DNS/TCP/TLS setup.
+# Leaves an HTTP/2 adapter or a pool that is already big enough alone.
+def size_pool(session, pool_size):
+    for prefix in ("https://", "http://"):
+        adapter = session.adapters.get(prefix)
+        if isinstance(adapter, Http2Adapter):
+            continue
+        if isinstance(adapter, HTTPAdapter) and adapter._pool_maxsize >= pool_size:
+            continue
+        session.mount(prefix, HTTPAdapter(pool_connections=POOL_HOSTS, pool_maxsize=pool_size))
+    return session
+
+
+# One place where the scripts' sessions are built: default headers (sent on every request,
+# so callers don't pass them), compressed transfers, keep-alive, verify set once, and a
+# connection pool sized to the fetch concurrency. http2=True switches https:// to
+# Http2Adapter when httpx[http2] is installed and stays on HTTP/1.1 otherwise.
+#
+# `session` lets a requests.Session subclass (httpcache.CachedSession) be set up the same way.
+def make_session(headers=None, pool_size=16, verify=True, http2=False, session=None):
+    session = session if session is not None else requests.Session()
+    session.headers.update({"Accept-Encoding": ACCEPT_ENCODING, "Connection": "keep-alive"})
+    session.headers.update(headers or {})
+    session.verify = verify
+    if http2 and HTTP2_AVAILABLE:
+        session.mount("https://", Http2Adapter(pool_size, verify=verify))
+    return size_pool(session, pool_size)
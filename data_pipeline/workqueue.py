@@ -0,0 +1,285 @@
+import json
+import sqlite3
+import threading
+import time
+from urllib.parse import urlsplit
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id          INTEGER PRIMARY KEY,
+    queue       TEXT NOT NULL,
+    key         TEXT NOT NULL,
+    payload     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'queued',
+    worker      TEXT,
+    lease_until REAL,
+    attempts    INTEGER NOT NULL DEFAULT 0,
+    result      TEXT,
+    error       TEXT,
+    UNIQUE (queue, key)
+);
+CREATE INDEX IF NOT EXISTS tasks_status ON tasks (queue, status, id);
+CREATE TABLE IF NOT EXISTS sealed (
+    queue TEXT PRIMARY KEY
+);
+"""
+
+
+class Task:
+    __slots__ = ("id", "key", "payload", "attempts")
+
+    def __init__(self, id, key, payload, attempts):
+        self.id = id
+        self.key = key
+        self.payload = payload
+        self.attempts = attempts
+
+
+# Shared work queue with leases. A worker claims a task for `lease` seconds and renews the
+# lease while it works (Heartbeat); a task whose lease ran out (its worker crashed or hung)
+# is handed to the next worker that asks, up to `max_attempts` claims. fail() puts a task
+# back until then too. The coordinator seals a queue once every task is in, so workers
+# starting early wait for it rather than exit on an empty queue.
+#
+# Tasks are unique per key: putting a key again is a no-op until clear().
+#
+# SQLite version: one file, any number of processes on one host (or a shared disk with
+# working locks); claims run in BEGIN IMMEDIATE transactions.
+class SqliteQueue:
+    def __init__(self, path, name, lease=300, max_attempts=3):
+        self.path = path
+        self.name = name
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, timeout=60, isolation_level=None, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    def _tx(self, fn):
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                out = fn(self.conn)
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            self.conn.execute("COMMIT")
+            return out
+
+    def put(self, key, payload):
+        return self._tx(lambda c: c.execute(
+            "INSERT OR IGNORE INTO tasks (queue, key, payload) VALUES (?, ?, ?)",
+            (self.name, key, json.dumps(payload, ensure_ascii=False))).rowcount == 1)
+
+    def seal(self):
+        self._tx(lambda c: c.execute("INSERT OR IGNORE INTO sealed (queue) VALUES (?)", (self.name,)))
+
+    def sealed(self):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM sealed WHERE queue = ?", (self.name,)).fetchone() is not None
+
+    def clear(self):
+        def clear(c):
+            c.execute("DELETE FROM tasks WHERE queue = ?", (self.name,))
+            c.execute("DELETE FROM sealed WHERE queue = ?", (self.name,))
+        self._tx(clear)
+
+    def claim(self, worker):
+        def claim(c):
+            now = time.time()
+            c.execute(
+                "UPDATE tasks SET status = 'failed', error = 'lease expired on every attempt' "
+                "WHERE queue = ? AND status = 'leased' AND lease_until < ? AND attempts >= ?",
+                (self.name, now, self.max_attempts))
+            row = c.execute(
+                "SELECT id, key, payload, attempts FROM tasks WHERE queue = ? AND "
+                "(status = 'queued' OR (status = 'leased' AND lease_until < ?)) ORDER BY id LIMIT 1",
+                (self.name, now)).fetchone()
+            if not row:
+                return None
+            c.execute("UPDATE tasks SET status = 'leased', worker = ?, lease_until = ?, attempts = attempts + 1 "
+                      "WHERE id = ?", (worker, now + self.lease, row[0]))
+            return Task(row[0], row[1], json.loads(row[2]), row[3] + 1)
+        return self._tx(claim)
+
+    # False once the task was reclaimed by someone else: stop working on it
+    def renew(self, task, worker):
+        return self._tx(lambda c: c.execute(
+            "UPDATE tasks SET lease_until = ? WHERE id = ? AND status = 'leased' AND worker = ?",
+            (time.time() + self.lease, task.id, worker)).rowcount == 1)
+
+    def done(self, task, worker, result=None):
+        self._tx(lambda c: c.execute(
+            "UPDATE tasks SET status = 'done', result = ?, error = NULL WHERE id = ? AND status = 'leased' AND worker = ?",
+            (json.dumps(result, ensure_ascii=False), task.id, worker)))
+
+    def fail(self, task, worker, error):
+        self._tx(lambda c: c.execute(
+            "UPDATE tasks SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'queued' END, error = ? "
+            "WHERE id = ? AND status = 'leased' AND worker = ?", (self.max_attempts, str(error), task.id, worker)))
+
+    # Before: 40 tasks, 3 being worked on → After: {"queued": 37, "leased": 3}
+    def counts(self):
+        with self.lock:
+            return dict(self.conn.execute(
+                "SELECT status, COUNT(*) FROM tasks WHERE queue = ? GROUP BY status", (self.name,)))
+
+    # [(key, payload, result or error), ...] in the order the tasks were put
+    def finished(self, status="done"):
+        with self.lock:
+            rows = self.conn.execute(
+                "SELECT key, payload, CASE status WHEN 'done' THEN result ELSE error END FROM tasks "
+                "WHERE queue = ? AND status = ? ORDER BY id", (self.name, status)).fetchall()
+        return [(k, json.loads(p), json.loads(r) if status == "done" and r else r) for k, p, r in rows]
+
+
+# Same queue on a Redis server, for workers on several hosts. Every state change is one Lua
+# script, so claims stay atomic; lease deadlines use the claiming client's clock.
+#   <name>:ids      hash key → id          <name>:queued   list of ids, oldest first
+#   <name>:tasks    hash id → task json    <name>:leases   zset id → lease deadline
+class RedisQueue:
+    CLAIM = """
+    local now, lease, max_attempts = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3])
+    for _, id in ipairs(redis.call('ZRANGEBYSCORE', KEYS[3], '-inf', now)) do
+        redis.call('ZREM', KEYS[3], id)
+        local t = cjson.decode(redis.call('HGET', KEYS[2], id))
+        if t.attempts >= max_attempts then
+            t.status, t.error = 'failed', 'lease expired on every attempt'
+            redis.call('HSET', KEYS[2], id, cjson.encode(t))
+        else
+            redis.call('LPUSH', KEYS[1], id)
+        end
+    end
+    local id = redis.call('LPOP', KEYS[1])
+    if not id then return nil end
+    local t = cjson.decode(redis.call('HGET', KEYS[2], id))
+    t.status, t.worker, t.attempts = 'leased', ARGV[4], t.attempts + 1
+    redis.call('HSET', KEYS[2], id, cjson.encode(t))
+    redis.call('ZADD', KEYS[3], now + lease, id)
+    return {id, cjson.encode(t)}
+    """
+    # ARGV: id, worker, new status ('leased' to renew), deadline or result/error json
+    UPDATE = """
+    local t = cjson.decode(redis.call('HGET', KEYS[2], ARGV[1]) or '{}')
+    if t.status ~= 'leased' or t.worker ~= ARGV[2] then return 0 end
+    if ARGV[3] == 'leased' then
+        redis.call('ZADD', KEYS[3], ARGV[4], ARGV[1])
+        return 1
+    end
+    redis.call('ZREM', KEYS[3], ARGV[1])
+    local status = ARGV[3]
+    if status == 'queued' and t.attempts >= tonumber(ARGV[5]) then status = 'failed' end
+    t.status = status
+    if status == 'done' then t.result = ARGV[4] else t.error = ARGV[4] end
+    if status == 'queued' then redis.call('RPUSH', KEYS[1], ARGV[1]) end
+    redis.call('HSET', KEYS[2], ARGV[1], cjson.encode(t))
+    return 1
+    """
+
+    def __init__(self, url, name, lease=300, max_attempts=3):
+        try:
+            import redis
+        except ImportError as e:
+            raise ImportError("A redis:// queue needs the redis client: pip install redis") from e
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.name = name
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.keys = [f"{name}:queued", f"{name}:tasks", f"{name}:leases"]
+        self._claim = self.redis.register_script(self.CLAIM)
+        self._update = self.redis.register_script(self.UPDATE)
+
+    def close(self):
+        self.redis.close()
+
+    def put(self, key, payload):
+        if not self.redis.hsetnx(f"{self.name}:ids", key, ""):
+            return False
+        task_id = self.redis.incr(f"{self.name}:seq")
+        task = {"key": key, "payload": payload, "status": "queued", "attempts": 0}
+        pipe = self.redis.pipeline()
+        pipe.hset(f"{self.name}:ids", key, task_id)
+        pipe.hset(f"{self.name}:tasks", task_id, json.dumps(task, ensure_ascii=False))
+        pipe.rpush(f"{self.name}:queued", task_id)
+        pipe.execute()
+        return True
+
+    def seal(self):
+        self.redis.set(f"{self.name}:sealed", 1)
+
+    def sealed(self):
+        return bool(self.redis.exists(f"{self.name}:sealed"))
+
+    def clear(self):
+        self.redis.delete(*self.keys, f"{self.name}:ids", f"{self.name}:seq", f"{self.name}:sealed")
+
+    def claim(self, worker):
+        got = self._claim(keys=self.keys, args=[time.time(), self.lease, self.max_attempts, worker])
+        if not got:
+            return None
+        task = json.loads(got[1])
+        return Task(int(got[0]), task["key"], task["payload"], task["attempts"])
+
+    def renew(self, task, worker):
+        return bool(self._update(keys=self.keys, args=[task.id, worker, "leased", time.time() + self.lease]))
+
+    def done(self, task, worker, result=None):
+        self._update(keys=self.keys, args=[task.id, worker, "done", json.dumps(result, ensure_ascii=False)])
+
+    def fail(self, task, worker, error):
+        self._update(keys=self.keys, args=[task.id, worker, "queued", str(error), self.max_attempts])
+
+    def _tasks(self):
+        return sorted((int(i), json.loads(t)) for i, t in self.redis.hgetall(f"{self.name}:tasks").items())
+
+    def counts(self):
+        out = {}
+        for _, t in self._tasks():
+            out[t["status"]] = out.get(t["status"], 0) + 1
+        return out
+
+    def finished(self, status="done"):
+        return [(t["key"], t["payload"], json.loads(t["result"]) if status == "done" else t.get("error"))
+                for _, t in self._tasks() if t["status"] == status]
+
+
+# Before: open_queue("redis://host:6379/0", "marsol") → After: RedisQueue; "sqlite:///q.db"
+# or a plain path → SqliteQueue
+def open_queue(url, name, lease=300, max_attempts=3):
+    scheme = urlsplit(url).scheme
+    if scheme in ("redis", "rediss", "unix"):
+        return RedisQueue(url, name, lease, max_attempts)
+    if scheme in ("", "sqlite"):
+        return SqliteQueue(url[len("sqlite:///"):] if scheme else url, name, lease, max_attempts)
+    raise ValueError(f"Unsupported queue {url!r} (expected sqlite:///path or redis://host)")
+
+
+# Renews a claimed task's lease every lease/3 seconds while the with-block runs; `lost` is
+# set if the task was reclaimed meanwhile (the lease ran out during a long stall).
+class Heartbeat:
+    def __init__(self, queue, task, worker):
+        self.queue = queue
+        self.task = task
+        self.worker = worker
+        self.lost = False
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self._beat, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+
+    def _beat(self):
+        while not self.stop.wait(self.queue.lease / 3):
+            if not self.queue.renew(self.task, self.worker):
+                self.lost = True
+                return
@@ -0,0 +1,50 @@
+import csv
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bench.stub_server import StubSite  # noqa: E402
+
+# the stub answers at once; rate limits and retries would only slow the tests down
+FAST = {"requests_per_sec": 1000.0, "max_requests_per_sec": 1000.0, "burst": 64, "max_attempts": 1,
+        "http2": False, "parse_workers": 1}
+
+
+# Stub of both sites with pages that can be made to fail: stub.broken is a set of path
+# prefixes answered with 404, stub.paths every path requested.
+class BreakableStub(StubSite):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.broken = set()
+        self.paths = []
+
+    def page(self, path, base):
+        self.paths.append(path)
+        if any(path.startswith(p) for p in self.broken):
+            return None
+        return super().page(path, base)
+
+
+@pytest.fixture
+def stub():
+    with BreakableStub(0.0, categories=3, per_page=10, pages=3, companies=50, partners=30) as site:
+        site.base = site.start()
+        yield site
+
+
+# Before: make_site(Marsol, tmp_path, stub.base) → After: a Marsol adapter on the stub, writing
+# tmp_path/out.csv (state, history and partial files next to it)
+def make_site(cls, folder, base, **settings):
+    return cls(**{
+        "base_url": base, "output_path": str(folder / "out.csv"), "state_path": str(folder / "state.db"),
+        "history_path": str(folder / "history.db"), **FAST, **settings,
+    })
+
+
+def read_csv(path):
+    with open(path, encoding="utf-8", newline="") as fh:
+        return list(csv.DictReader(fh))
@@ -0,0 +1,19 @@
+from conftest import ROOT  # noqa: F401
+
+from data_pipeline.checkpoint import CrawlState
+
+
+# every category a company is listed in, in the categories' order rather than the table's
+def test_rows_list_their_categories_in_list_order(tmp_path):
+    with CrawlState(str(tmp_path / "state.db")) as state:
+        state.save_categories([{"group": "Zoos", "url": "cat/z"}, {"group": "Malls", "url": "cat/m"},
+                               {"group": "Arts", "url": "cat/a"}])
+        state.add_companies("cat/a", ["https://x.az/1", "https://x.az/2"])
+        state.add_companies("cat/m", ["https://x.az/2", "https://x.az/3"])
+        state.add_companies("cat/z", ["https://x.az/1"])
+        for u in ("https://x.az/1", "https://x.az/2"):
+            state.save_row("cat/a", u, {"url": u, "category": "Arts"})
+        state.save_row("cat/m", "https://x.az/3", {"url": "https://x.az/3", "category": "Malls"})
+        assert [(r["url"], r["category"]) for r in state.iter_rows()] == [
+            ("https://x.az/3", "Malls"), ("https://x.az/1", "Zoos; Arts"), ("https://x.az/2", "Malls; Arts")]
+        assert [r["category"] for r in state.iter_rows(None)] == ["Malls", "Arts", "Arts"]
@@ -0,0 +1,94 @@
+import json
+import random
+
+import pytest
+from conftest import make_site, read_csv
+
+from data_pipeline.consolidate import consolidate
+from data_pipeline.sinks import open_sink
+from data_pipeline.sites.marsol import COLUMNS, Marsol
+
+pa = pytest.importorskip("pyarrow")
+
+
+def write(path, rows):
+    with open_sink(str(path), COLUMNS) as sink:
+        for row in rows:
+            sink.write({c: row.get(c, "") for c in COLUMNS})
+    return str(path)
+
+
+OLD = [
+    {"company": "Partner 1", "category": "Cat 1", "url": "https://marsol.az/partner/1/", "address": "Old 1"},
+    {"company": "Partner 2", "category": "Cat 2", "url": "https://marsol.az/partner/2/", "telefon": "012 444 02 00"},
+    {"company": "Partner 3", "category": "Cat 3", "url": "https://marsol.az/partner/3/", "address": " "},
+]
+NEW = [
+    # same page under a tracking parameter: the newer row wins
+    {"company": "Partner 1", "category": "Cat 1", "url": "https://marsol.az/partner/1/?utm_source=x",
+     "address": "New 1"},
+    # another url, same name and first phone: one record
+    {"company": " partner  2 ", "category": "Cat 2", "url": "https://marsol.az/p/2/",
+     "telefon": "+994 12 444 02 00, 050 000 00 00"},
+]
+
+
+def test_consolidate_dedups_by_url_then_contact(tmp_path):
+    site = make_site(Marsol, tmp_path, "https://marsol.az")
+    out = str(tmp_path / "all.csv")
+    count = consolidate(site, [write(tmp_path / "old.csv", OLD), write(tmp_path / "new.jsonl", NEW)], out, workers=2)
+    rows = read_csv(out)
+    assert count == len(rows) == 3
+    assert [r["url"] for r in rows] == ["https://marsol.az/partner/3/", "https://marsol.az/partner/1/",
+                                        "https://marsol.az/p/2/"]
+    assert rows[0]["address"] == ""
+    assert rows[1]["address"] == "New 1"
+    assert rows[2]["company"] == "partner  2"
+
+
+def test_consolidate_to_parquet_keeps_types(tmp_path):
+    import pyarrow.parquet as pq
+
+    site = make_site(Marsol, tmp_path, "https://marsol.az")
+    out = str(tmp_path / "all.parquet")
+    assert consolidate(site, [write(tmp_path / "old.jsonl", OLD)], out, workers=1) == 3
+    t = pq.read_table(out)
+    assert t.column_names == COLUMNS
+    assert pa.types.is_dictionary(t.schema.field("category").type)
+    assert t["address"].to_pylist() == ["Old 1", None, None]
+
+
+def test_consolidate_rejects_unknown_formats(tmp_path):
+    site = make_site(Marsol, tmp_path, "https://marsol.az")
+    (tmp_path / "state.db").write_text(json.dumps({}))
+    with pytest.raises(ValueError):
+        consolidate(site, [str(tmp_path / "state.db")], str(tmp_path / "all.csv"))
+
+
+def test_consolidate_normalizes_phones(tmp_path):
+    site = make_site(Marsol, tmp_path, "https://marsol.az")
+    out = str(tmp_path / "all.csv")
+    rows = [{"company": "Partner 1", "url": "https://marsol.az/partner/1/",
+             "telefon": "012 444 01 00; +994 12 444 01 00; 050 111 22 33", "mobil": "(055) 222-33-44"},
+            {"company": "Partner 2", "url": "https://marsol.az/partner/2/", "telefon": "short 12"}]
+    consolidate(site, [write(tmp_path / "in.jsonl", rows)], out, workers=1, normalize_phones=True)
+    assert [(r["telefon"], r["mobil"]) for r in read_csv(out)] == [
+        ("+994124440100; +994501112233", "+994552223344"), ("short 12", "")]
+
+
+# the column helper agrees with normalize_az_phone number by number
+def test_normalize_phone_column_matches_normalize_az_phone():
+    pd = pytest.importorskip("pandas")
+    from data_pipeline.phones import normalize_az_phone, normalize_phone_column
+
+    rng = random.Random(7)
+    spellings = ["0{0} {1}", "+994 {0} {1}", "994{0}{1}", "00994 ({0}) {1}", "{0}-{1}"]
+    cells = []
+    for _ in range(300):
+        numbers = [rng.choice(spellings).format(rng.choice(["12", "50", "55", "70"]), rng.randrange(10 ** 6, 10 ** 7))
+                   for _ in range(rng.randrange(0, 4))]
+        cells.append(", ".join(numbers + numbers[:1]) if numbers else rng.choice([None, ""]))
+    got = normalize_phone_column(pd.Series(cells))
+    for cell, value in zip(cells, got):
+        want = list(dict.fromkeys(normalize_az_phone(n) for n in cell.split(", "))) if cell else []
+        assert (value.split(", ") if value is not pd.NA else []) == want
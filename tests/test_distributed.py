@@ -0,0 +1,31 @@
+import pytest
+from conftest import FAST, make_site, read_csv
+
+from data_pipeline import distributed, run
+from data_pipeline.sites.azerbaijanyp import AzerbaijanYP
+from data_pipeline.sites.marsol import Marsol
+from data_pipeline.workqueue import open_queue
+
+
+# coordinate, two workers in turn and merge write what one local run writes
+@pytest.mark.parametrize("cls,settings", [(AzerbaijanYP, {}), (Marsol, {"shard_pages": 1})])
+def test_distributed_run_matches_a_local_run(stub, tmp_path, cls, settings):
+    local, dist = tmp_path / "local", tmp_path / "dist"
+    local.mkdir(), dist.mkdir()
+    assert run(make_site(cls, local, stub.base, **settings), cache_path=str(local / "cache.db"), cache_ttl=0,
+               fresh=True)
+
+    site = make_site(cls, dist, stub.base, **settings)
+    queue_url, parts = f"sqlite:///{dist / 'queue.db'}", str(dist / "parts")
+    queue = open_queue(queue_url, site.name)
+    distributed.coordinate(site, {"base_url": stub.base, **FAST, **settings}, queue, parts, fresh=True,
+                           cache_path=str(dist / "cache.db"), cache_ttl=0)
+    tasks = queue.counts()["queued"]
+    assert tasks == 3
+    assert sum(distributed.work(queue_url, [site.name], parts, worker=w, poll=0.01, cache_ttl=0)
+               for w in ("w1", "w2")) == tasks
+    assert distributed.merge(site, queue, parts)
+
+    key = lambda r: r.get("url") or r["company name"]  # noqa: E731
+    assert sorted(read_csv(site.output_path), key=key) == \
+        sorted(read_csv(str(local / "out.csv")), key=key)
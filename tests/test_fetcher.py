@@ -0,0 +1,89 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from conftest import ROOT  # noqa: F401
+
+from data_pipeline.fetcher import BodyTooLarge, FetchEngine
+from data_pipeline.httpcache import CachedSession, CacheMiss, HttpCache
+from data_pipeline.parsing import until
+from data_pipeline.retry import RetryPolicy
+from data_pipeline.sites.azerbaijanyp import COMPANY_UNTIL
+from bench.stub_server import StubSite
+
+
+@pytest.fixture
+def long_pages():
+    with StubSite(0.0, extra=400) as stub:
+        yield stub, stub.start()
+
+
+def test_body_is_read_up_to_until(long_pages):
+    stub, base = long_pages
+    engine = FetchEngine(rate_per_host=1000)
+    cut, full = engine.get(f"{base}/company/5/x", until=COMPANY_UNTIL), engine.get(f"{base}/company/5/x")
+    assert cut.truncated and not full.truncated
+    assert len(cut.content) < len(full.content)
+    assert full.content.startswith(cut.content)
+
+
+# a body cut at one `until` is only served to requests with the same one
+def test_cut_body_is_kept_apart_in_the_cache(long_pages, tmp_path):
+    stub, base = long_pages
+    url = f"{base}/company/5/x"
+    engine = FetchEngine(CachedSession(HttpCache(str(tmp_path / "c.db"))), rate_per_host=1000)
+    cut = engine.get(url, until=COMPANY_UNTIL)
+    assert engine.get(url, until=COMPANY_UNTIL).from_cache
+    assert stub.hits == 1
+
+    offline = CachedSession(HttpCache(str(tmp_path / "c.db"), offline=True))
+    assert offline.get(url, until=COMPANY_UNTIL).content == cut.content
+    with pytest.raises(CacheMiss):
+        offline.get(url)
+
+    other = engine.get(url, until=until(classes=["nothing-like-this"]))
+    assert not getattr(other, "from_cache", False) and not other.truncated
+    assert stub.hits == 2
+    # the whole body serves every request
+    assert engine.get(url).content == other.content
+    assert engine.get(url, until=COMPANY_UNTIL).from_cache
+    assert stub.hits == 2
+
+
+def test_body_over_max_body_fails(long_pages):
+    stub, base = long_pages
+    with pytest.raises(BodyTooLarge):
+        FetchEngine(rate_per_host=1000, max_body=10_000).get(f"{base}/company/5/x")
+
+
+# a chunked body that breaks off mid-read is retried like a connection error
+def test_body_broken_off_is_retried():
+    sent = []
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            sent.append(self.path)
+            self.send_response(200)
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            self.wfile.write(b"3e8\r\n" + b"x" * 1000 + b"\r\n")
+            if len(sent) < 3:
+                self.wfile.write(b"zz\r\n")
+                self.close_connection = True
+                return
+            self.wfile.write(b"0\r\n\r\n")
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        engine = FetchEngine(rate_per_host=1000, retry=RetryPolicy(max_attempts=5, base=0.01))
+        r = engine.get(f"http://127.0.0.1:{server.server_address[1]}/")
+    finally:
+        server.shutdown()
+    assert len(r.content) == 1000
+    assert len(sent) == 3
@@ -0,0 +1,30 @@
+from conftest import ROOT  # noqa: F401
+
+from data_pipeline.checkpoint import CrawlState
+from data_pipeline.frontier import UrlFrontier, canonicalize_url, url_hash
+
+
+def test_canonicalize_url():
+    assert canonicalize_url("HTTPS://WWW.Example.com:443/company/1/x?utm_source=a&b=2&a=1#map") == \
+        "https://www.example.com/company/1/x?a=1&b=2"
+    assert canonicalize_url("http://example.com:80/a") == "http://example.com/a"
+    assert url_hash(canonicalize_url("http://Example.com/a?b=1&a=2")) == url_hash("http://example.com/a?a=2&b=1")
+
+
+def test_frontier_in_memory():
+    f = UrlFrontier(capacity=1000)
+    assert f.add("https://x.az/company/1")
+    assert not f.add("https://x.az/company/1")
+    assert "https://x.az/company/1" in f
+    assert "https://x.az/company/2" not in f
+
+
+# the store is authoritative: a reopened state still knows what was queued
+def test_frontier_survives_a_restart(tmp_path):
+    path = str(tmp_path / "state.db")
+    with CrawlState(path) as state:
+        state.add_companies("cat/a", ["https://x.az/company/1", "https://x.az/company/2"])
+    with CrawlState(path) as state:
+        state.add_companies("cat/b", ["https://X.az/company/2", "https://x.az/company/3"])
+        assert state.company_urls("cat/a") == ["https://x.az/company/1", "https://x.az/company/2"]
+        assert state.company_urls("cat/b") == ["https://x.az/company/3"]
@@ -0,0 +1,96 @@
+from conftest import ROOT  # noqa: F401  (puts the repo on sys.path)
+
+from bench import pages
+from data_pipeline.parsing import make_soup
+from data_pipeline.sites import azerbaijanyp as yp
+from data_pipeline.sites import marsol
+
+
+def test_yp_company_page():
+    row = yp.parse_company_html("https://www.azerbaijanyp.com/company/3/x", pages.yp_company(3).encode(), "Banks")
+    assert dict(row) == {
+        "company name": "Company 3 LLC",
+        "category": "Banks",
+        "address": "Baku, street 3",
+        "contact number 1": "+994124035540",
+        "contact number 2": "+994500031122",
+        "contact numbers (others)": "+994124445566",
+        "phone number": "+994501234003",
+        "fax": "+994125550013",
+        "establishment year": "1993",
+        "employees": "3 employees",
+        "website address": "c3.az",
+        "url": "https://www.azerbaijanyp.com/company/3/x",
+    }
+
+
+# the filler blocks and page chrome of long pages don't leak into the row
+def test_yp_long_page_reads_like_the_short_one():
+    url = "https://www.azerbaijanyp.com/company/8/x"
+    assert dict(yp.parse_company_html(url, pages.yp_company(8, extra=20).encode())) == \
+        dict(yp.parse_company_html(url, pages.yp_company(8).encode()))
+
+
+def test_yp_page_cut_at_company_until_parses_the_same():
+    html = pages.yp_company(5, extra=20).encode()
+    watch = yp.COMPANY_UNTIL.watch()
+    read = b""
+    for i in range(0, len(html), 1024):
+        read += html[i:i + 1024]
+        if watch.feed(html[i:i + 1024]):
+            break
+    assert len(read) < len(html)
+    url = "https://www.azerbaijanyp.com/company/5/x"
+    assert dict(yp.parse_company_html(url, read)) == dict(yp.parse_company_html(url, html))
+
+
+def test_yp_listing_and_browse_pages():
+    base = "https://www.azerbaijanyp.com"
+    soup = make_soup(pages.yp_category(1, 2, per_page=3, pages=4), yp.CATEGORY_ONLY)
+    assert yp.company_links(soup, base) == [f"{base}/company/{n}/c-{n}" for n in (3, 4, 5)]
+    assert yp.find_next_page_url(soup, base) == f"{base}/category/cat1/3"
+    assert yp.listing_page_urls(soup, f"{base}/category/cat1", base) == \
+        {n: f"{base}/category/cat1/{n}" for n in (1, 2, 3, 4)}
+
+    groups = yp.extract_all_categories(make_soup(pages.yp_browse(2), yp.BROWSE_ONLY), base)
+    assert groups == [{"group": "Category 0", "url": f"{base}/category/cat0"},
+                      {"group": "Category 1", "url": f"{base}/category/cat1"}]
+
+
+def partner(i):
+    return dict(marsol.parse_partner_page(("g", "Cat", f"https://marsol.az/partner/{i}/", f"Partner {i}"),
+                                          pages.marsol_partner(i).encode()))
+
+
+def test_marsol_partner_labelled_paragraphs():
+    row = partner(0)
+    assert row["company"] == "Partner 0"
+    assert row["category"] == "Cat"
+    assert row["address"] == "Bakı şəh., Nizami küç. 0"
+    assert row["telefon"] == "+994 12 555 00 11 +994 12 555 00 12"
+    assert row["mobil"] == "+994 50 222 00 33"
+    assert row["email"] == "info0@x.az"
+    assert row["web"] == "https://sayt0.az"
+
+
+def test_marsol_partner_list_items():
+    row = partner(1)
+    assert row["address"] == "Gəncə 1"
+    assert row["telefon"] == row["mobil"] == "012 444 01 00"
+    assert row["facebook"] == "https://fb.com/p1"
+    assert row["instagram"] == "shop1"
+
+
+def test_marsol_partner_line_breaks_and_embeds():
+    row = partner(3)
+    assert row["address"] == "Sumqayıt 3"
+    assert row["telefon"] == "018 000 03 00"
+    assert row["email"] == "contact3@gilasoptic.az"
+    assert row["instagram"] == "https://www.instagram.com/x3/"
+
+
+def test_marsol_listing_cards():
+    soup = make_soup(pages.marsol_listing(2, "https://marsol.az", per_page=4, partners=10), marsol.LISTING_ONLY)
+    assert marsol.listing_cards(soup) == [
+        (f"Partner {n}", f"https://marsol.az/partner/{n}/", f"Cat {n % 7}") for n in (4, 5, 6, 7)]
+    assert marsol.last_listing_page(soup) == 3
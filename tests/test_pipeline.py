@@ -0,0 +1,119 @@
+import importlib.util
+import json
+import os
+
+from conftest import make_site, read_csv
+
+from data_pipeline import run
+from data_pipeline.retry import DeadLetterQueue
+from data_pipeline.sites.azerbaijanyp import AzerbaijanYP
+from data_pipeline.sites.marsol import Marsol
+
+
+def crawl(site, tmp_path, **kwargs):
+    return run(site, cache_path=str(tmp_path / "cache.db"), cache_ttl=0, metrics_path=str(tmp_path / "m.jsonl"),
+               **kwargs)
+
+
+def test_failed_page_is_retried_on_the_next_run(stub, tmp_path):
+    site = make_site(Marsol, tmp_path, stub.base)
+    stub.broken = {"/partner/7/"}
+    assert not crawl(site, tmp_path, fresh=True)
+    assert len(read_csv(site.output_path)) == 29
+    assert [e["item"][2] for e in DeadLetterQueue(str(tmp_path / "out.failed.jsonl")).entries()] == \
+        [f"{stub.base}/partner/7/"]
+
+    stub.broken = set()
+    assert crawl(site, tmp_path, fresh=True)
+    rows = read_csv(site.output_path)
+    assert len(rows) == 30
+    assert not (tmp_path / "out.failed.jsonl").exists()
+
+
+# a dead letter the listing no longer shows keeps the company and category it was queued with
+def test_dead_letter_not_listed_again_keeps_its_item(stub, tmp_path):
+    site = make_site(Marsol, tmp_path, stub.base)
+    item = [f"{stub.base}/partnyorlarimiz/", "Cat 9", f"{stub.base}/partner/99/", "Partner 99"]
+    DeadLetterQueue(str(tmp_path / "out.failed.jsonl")).add(item, "503 Server Error")
+
+    assert crawl(site, tmp_path, fresh=True)
+    rows = {r["url"]: r for r in read_csv(site.output_path)}
+    assert len(rows) == 31
+    assert rows[item[2]]["company"] == "Partner 99"
+    assert rows[item[2]]["category"] == "Cat 9"
+    assert rows[item[2]]["address"] == "Sumqayıt 99"
+
+
+def test_dead_letter_of_a_category_gone_from_the_listing(stub, tmp_path):
+    site = make_site(AzerbaijanYP, tmp_path, stub.base)
+    item = [f"{stub.base}/category/cat7", "Category 7", f"{stub.base}/company/77/c-77"]
+    DeadLetterQueue(str(tmp_path / "out.failed.jsonl")).add(item, "503 Server Error")
+
+    crawl(site, tmp_path, fresh=True)
+    rows = {r["company name"]: r for r in read_csv(site.output_path)}
+    assert len(rows) == 51
+    assert rows["Company 77 LLC"]["category"] == "Category 7"
+    assert json.loads((tmp_path / "out.partial.jsonl").read_text(encoding="utf-8").splitlines()[-1])["url"] == item[2]
+
+
+# a resume fetches only what the last run didn't finish; --fresh starts over
+def test_resume_fetches_only_failed_pages(stub, tmp_path):
+    site = make_site(AzerbaijanYP, tmp_path, stub.base)
+    stub.broken = {"/company/7/"}
+    assert not crawl(site, tmp_path, fresh=True)
+    assert len(read_csv(site.output_path)) == 49
+
+    stub.broken, stub.paths = set(), []
+    assert crawl(site, tmp_path)
+    assert stub.paths == ["/company/7/c-7"]
+    assert len(read_csv(site.output_path)) == 50
+
+    stub.paths = []
+    assert crawl(site, tmp_path)
+    assert stub.paths == []
+    assert len(read_csv(site.output_path)) == 50
+
+    assert crawl(site, tmp_path, fresh=True)
+    assert len([p for p in stub.paths if p.startswith("/company/")]) == 50
+    assert len(read_csv(site.output_path)) == 50
+
+
+def test_resume_of_a_listing_site_refetches_no_partner_pages(stub, tmp_path):
+    site = make_site(Marsol, tmp_path, stub.base)
+    stub.broken = {"/partner/7/"}
+    crawl(site, tmp_path, fresh=True)
+    stub.broken, stub.paths = set(), []
+    assert crawl(site, tmp_path)
+    assert [p for p in stub.paths if p.startswith("/partner/")] == ["/partner/7/"]
+    assert len(read_csv(site.output_path)) == 30
+
+
+def partial_urls(tmp_path):
+    lines = (tmp_path / "out.partial.jsonl").read_text(encoding="utf-8").splitlines()
+    return [json.loads(line)["url"] for line in lines]
+
+
+# a resume adds to the partial rows of the run it continues
+def test_resume_appends_to_the_partial_file(stub, tmp_path):
+    site = make_site(Marsol, tmp_path, stub.base)
+    stub.broken = {"/partner/7/"}
+    crawl(site, tmp_path, fresh=True)
+    assert len(partial_urls(tmp_path)) == 29
+
+    stub.broken = set()
+    crawl(site, tmp_path)
+    urls = partial_urls(tmp_path)
+    assert len(urls) == len(set(urls)) == 30
+    assert urls[-1] == f"{stub.base}/partner/7/"
+
+    crawl(site, tmp_path, fresh=True)
+    assert len(partial_urls(tmp_path)) == 30
+
+
+def test_profile_tool(stub, tmp_path):
+    tool = "pyinstrument" if importlib.util.find_spec("pyinstrument") else "cprofile"
+    crawl(make_site(Marsol, tmp_path, stub.base), tmp_path, fresh=True, profile_sample=1.0,
+          profile_dir=str(tmp_path / "profiles"), profile_tool=tool)
+    dumps = os.listdir(tmp_path / "profiles")
+    assert len(dumps) == 30
+    assert all(d.endswith(".html" if tool == "pyinstrument" else ".prof") for d in dumps)
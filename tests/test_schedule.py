@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+from conftest import ROOT  # noqa: F401
+
+from data_pipeline.schedule import DAY, Budget, Scheduler
+
+
+def test_scheduler_order():
+    now = 100 * DAY
+    stats = {
+        "often": (now - 70 * DAY, now - 7 * DAY, 10, 8),
+        "bank": (now - 70 * DAY, now - 7 * DAY, 10, 0),
+        "never": (now - 70 * DAY, now - 7 * DAY, 10, 0),
+    }
+    s = Scheduler(stats, {"Banks": 3.0}, now)
+    s.extend([("g", "Shops", "never"), ("g", "Banks", "bank"), ("g", "Shops", "often"), ("g", "Shops", "new")])
+    assert [item[2] for item in s] == ["new", "often", "bank", "never"]
+    assert not len(s)
+
+
+# pages handed out send one request each, or hit the cache
+def consume(budget, engine, items, cached=()):
+    taken = []
+    for item in budget.limit(items):
+        engine.calls += 1
+        if item not in cached:
+            engine.sent += 1
+        taken.append(item)
+    return taken
+
+
+def test_budget_stops_at_the_request_limit():
+    engine = SimpleNamespace(sent=5, calls=5)  # discovery isn't charged
+    budget = Budget(engine, requests=3)
+    assert consume(budget, engine, range(10)) == [0, 1, 2]
+    assert budget.cut
+    assert str(budget).endswith("3 page requests (+5 for discovery)")
+
+
+def test_budget_cache_hits_are_free():
+    engine = SimpleNamespace(sent=0, calls=0)
+    budget = Budget(engine, requests=3)
+    assert consume(budget, engine, range(6), cached={1, 2}) == [0, 1, 2, 3, 4]
+    assert budget.cut
+
+
+def test_budget_not_cut_when_items_run_out():
+    engine = SimpleNamespace(sent=0, calls=0)
+    budget = Budget(engine, requests=3)
+    assert consume(budget, engine, range(3)) == [0, 1, 2]
+    assert not budget.cut
+
+
+# the fetch engine reads ahead: handed-out pages count before they send
+def test_budget_counts_pages_not_yet_sent():
+    engine = SimpleNamespace(sent=0, calls=0)
+    budget = Budget(engine, requests=2)
+    pages = budget.limit(range(5))
+    assert (next(pages), next(pages)) == (0, 1)
+    engine.calls += 1  # page 0 hit the cache
+    assert next(pages) == 2
+    engine.calls, engine.sent = 3, 2
+    assert next(pages, None) is None
+    assert budget.cut
+
+
+def test_time_budget():
+    engine = SimpleNamespace(sent=0, calls=0)
+    budget = Budget(engine, seconds=0)
+    assert list(budget.in_time(range(3))) == []
+    assert list(budget.limit(range(3))) == []
+    assert budget.cut
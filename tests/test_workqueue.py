@@ -0,0 +1,65 @@
+import time
+
+from conftest import ROOT  # noqa: F401
+
+from data_pipeline.checkpoint import CrawlState
+from data_pipeline.workqueue import open_queue
+
+
+def test_tasks_are_unique_and_claimed_in_order(tmp_path):
+    q = open_queue(f"sqlite:///{tmp_path / 'q.db'}", "site")
+    assert q.put("a", {"n": 1})
+    assert q.put("b", {"n": 2})
+    assert not q.put("a", {"n": 3})
+    assert q.claim("w1").payload == {"n": 1}
+    assert q.claim("w2").payload == {"n": 2}
+    assert q.claim("w3") is None
+    assert q.counts() == {"leased": 2}
+
+
+def test_expired_lease_is_reclaimed(tmp_path):
+    q = open_queue(str(tmp_path / "q.db"), "site", lease=0.2, max_attempts=2)
+    q.put("a", {})
+    first = q.claim("w1")
+    assert q.claim("w2") is None
+    time.sleep(0.3)
+    second = q.claim("w2")
+    assert (second.key, second.attempts) == ("a", 2)
+    assert not q.renew(first, "w1")  # the first worker lost it
+    q.done(first, "w1", {"complete": True})
+    assert q.counts() == {"leased": 1}
+    q.done(second, "w2", {"complete": True})
+    assert q.finished() == [("a", {}, {"complete": True})]
+
+
+def test_failed_task_is_retried_up_to_max_attempts(tmp_path):
+    q = open_queue(str(tmp_path / "q.db"), "site", max_attempts=2)
+    q.put("a", {})
+    q.fail(q.claim("w1"), "w1", RuntimeError("boom"))
+    assert q.counts() == {"queued": 1}
+    q.fail(q.claim("w1"), "w1", RuntimeError("boom again"))
+    assert q.claim("w1") is None
+    assert q.finished("failed") == [("a", {}, "boom again")]
+
+
+def partition(path, category, urls, done=True):
+    with CrawlState(path) as state:
+        state.save_categories([{"group": category.upper(), "url": category}])
+        state.add_companies(category, urls)
+        for u in urls if done else []:
+            state.save_row(category, u, {"url": u})
+    return path
+
+
+# partitions are appended in order; a page two tasks fetched keeps its first row and both groups
+def test_absorb_merges_partitions(tmp_path):
+    a = partition(str(tmp_path / "a.db"), "cat/a", ["https://x.az/1", "https://x.az/2"])
+    b = partition(str(tmp_path / "b.db"), "cat/b", ["https://x.az/2", "https://x.az/3"])
+    c = partition(str(tmp_path / "c.db"), "cat/c", ["https://x.az/4"], done=False)
+    with CrawlState(str(tmp_path / "merged.db")) as merged:
+        for p in (a, b, c):
+            merged.absorb(p)
+        assert [g["url"] for g in merged.load_categories()] == ["cat/a", "cat/b", "cat/c"]
+        rows = list(merged.iter_rows("group"))
+    assert rows == [{"url": "https://x.az/1", "group": "CAT/A"}, {"url": "https://x.az/2", "group": "CAT/A; CAT/B"},
+                    {"url": "https://x.az/3", "group": "CAT/B"}]